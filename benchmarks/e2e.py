@@ -0,0 +1,207 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+import contextlib
+
+# Offline end-to-end benchmark: every scenario runs in its own process against a fake S3,
+# a fake Groq/DeepSeek/OpenAI server and mongomock (or a local mongod via --mongo-uri).
+# Peak RSS is per process and includes the in-process fakes. Needs mongomock unless --mongo-uri is given.
+#
+#   python -m benchmarks.e2e                    run everything, compare with the saved baseline
+#   python -m benchmarks.e2e --save-baseline    run everything and store it as the new baseline
+#   python -m benchmarks.e2e --only mixed --rate-429 0.05
+
+BUCKET = "bench-bucket"
+TENDERS_PER_RUN = 3
+DOCS_PER_TENDER = 2
+SCENARIOS = {
+    "text": ("text", 40),
+    "tables": ("table", 40),
+    "scanned": ("scanned", 12),
+    "mixed": ("mixed", 60),
+    "mixed-large": ("mixed", 240),
+}
+PIPELINES = ("extract_forms", "request_analysis")
+EXPORT_PIPELINES = ("export_forms", "download_documents")
+EXPORT_SCENARIOS = ("mixed", "mixed-large")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "results", "baseline.json")
+
+def _configure_env(s3, llm, cache_dir, mongo_uri):
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_REGION": "us-east-1",
+        "S3_BUCKET": BUCKET,
+        "S3_ENDPOINT_URL": s3.endpoint_url,
+        "PDF_CACHE_DIR": cache_dir,
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": llm.base_url,
+        "DEEPSEEK_API_KEY": "bench",
+        "DEEPSEEK_API_URL": f"{llm.base_url}/v1/chat/completions",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{llm.base_url}/v1",
+        "MONGO_URI": mongo_uri or "mongodb://127.0.0.1:1",
+        "DB_NAME": "bench",
+        "TENDERS_COLLECTION": "tenders",
+        "VECTOR_COLLECTION": "vectors",
+        "DOCS_STATUS_COLLECTION": "docs_status",
+    })
+
+def _use_mongomock():
+    import mongomock
+    from utils import mongo_utils
+    mongo_utils.get_client.set(mongomock.MongoClient())
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def _run_pipeline(pipeline, tender_id, page_count):
+    if pipeline == "extract_forms":
+        import extract_forms_server
+        report = await extract_forms_server.process_single_tender(tender_id)
+        return report["scanned_pages"] + report["regular_pages"]
+
+    if pipeline == "request_analysis":
+        import request_analysis_server
+        report = await request_analysis_server.process_single_tender(tender_id)
+        return report["scanned_pages"] + report["regular_pages"]
+
+    if pipeline == "export_forms":
+        import export_forms
+        pages = list(range(1, page_count + 1, 3))
+        form_data = {f"doc_{d}.pdf": pages for d in range(DOCS_PER_TENDER)}
+        await export_forms.export_form_pages_pdf(tender_id, form_data)
+        return len(pages) * DOCS_PER_TENDER
+
+    import download_documents
+    await download_documents.build_zip_stream_for_tender(tender_id)
+    return page_count * DOCS_PER_TENDER
+
+def run_child(scenario, pipeline, out_path, mongo_uri, rate_429):
+    from benchmarks.fake_s3 import FakeS3Server
+    from benchmarks.fake_llm import FakeLLMServer
+    from benchmarks.synthetic_pdfs import make_pdf
+
+    s3 = FakeS3Server(BUCKET, first_byte_latency=0.01, bytes_per_second=64 * 1024 * 1024).start()
+    llm = FakeLLMServer(rate_429={"groq": rate_429, "deepseek": rate_429, "openai": rate_429}).start()
+    cache_dir = tempfile.mkdtemp(prefix="e2e_bench_cache_")
+    _configure_env(s3, llm, cache_dir, mongo_uri)
+
+    kind, page_count = SCENARIOS[scenario]
+    docs = [make_pdf(kind, page_count, seed=d) for d in range(DOCS_PER_TENDER)]
+    tender_ids = [f"bench-{scenario}-{i}" for i in range(TENDERS_PER_RUN)]
+    for tender_id in tender_ids:
+        for d, data in enumerate(docs):
+            s3.put_object(f"tender-documents/{tender_id}/doc_{d}.pdf", data)
+
+    if not mongo_uri:
+        _use_mongomock()
+
+    latencies = []
+    pages_done = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for tender_id in tender_ids:
+            tender_start = time.perf_counter()
+            pages_done += asyncio.run(_run_pipeline(pipeline, tender_id, page_count))
+            latencies.append(time.perf_counter() - tender_start)
+    elapsed = time.perf_counter() - start
+
+    llm_calls = sum(llm.requests.values())
+    result = {
+        "pages": pages_done,
+        "pages_per_second": pages_done / elapsed if elapsed else 0.0,
+        "p50_seconds": _percentile(latencies, 50),
+        "p95_seconds": _percentile(latencies, 95),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "llm_calls": llm_calls,
+        "llm_calls_per_page": llm_calls / pages_done if pages_done else 0.0,
+        "llm_throttled": sum(llm.throttled.values()),
+        "s3_requests": s3.request_count,
+    }
+    with open(out_path, "w") as f:
+        json.dump(result, f)
+
+    s3.stop()
+    llm.stop()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+def _runs(only):
+    for scenario in SCENARIOS:
+        if only and scenario not in only:
+            continue
+        for pipeline in PIPELINES:
+            yield scenario, pipeline
+        if scenario in EXPORT_SCENARIOS:
+            for pipeline in EXPORT_PIPELINES:
+                yield scenario, pipeline
+
+def _delta(current, baseline, key):
+    if not baseline or not baseline.get(key):
+        return ""
+    return f"{(current[key] - baseline[key]) / baseline[key] * 100:+.0f}%"
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--child", nargs=2, metavar=("SCENARIO", "PIPELINE"), help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument("--mongo-uri", help="use a local mongod instead of mongomock")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.out, args.mongo_uri, args.rate_429)
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'run':<36} {'pages/s':>8} {'Δ':>6} {'p50 s':>7} {'p95 s':>7} {'Δ':>6} {'RSS MB':>7} {'calls/pg':>9} {'429s':>5}")
+    for scenario, pipeline in _runs(args.only):
+        name = f"{scenario}/{pipeline}"
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            out_path = tmp.name
+        cmd = [sys.executable, "-m", "benchmarks.e2e", "--child", scenario, pipeline, "--out", out_path, "--rate-429", str(args.rate_429)]
+        if args.mongo_uri:
+            cmd += ["--mongo-uri", args.mongo_uri]
+
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<36} FAILED\n{proc.stderr[-2000:]}")
+            continue
+
+        with open(out_path) as f:
+            result = json.load(f)
+        os.remove(out_path)
+        results[name] = result
+
+        base = baseline.get(name)
+        print(
+            f"{name:<36} {result['pages_per_second']:>8.1f} {_delta(result, base, 'pages_per_second'):>6} "
+            f"{result['p50_seconds']:>7.2f} {result['p95_seconds']:>7.2f} {_delta(result, base, 'p95_seconds'):>6} "
+            f"{result['peak_rss_mb']:>7.0f} {result['llm_calls_per_page']:>9.2f} {result['llm_throttled']:>5}"
+        )
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+
+if __name__ == "__main__":
+    main()
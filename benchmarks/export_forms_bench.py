@@ -0,0 +1,76 @@
+import io
+import os
+import time
+import tempfile
+import fitz
+from PyPDF2 import PdfReader, PdfWriter
+from export_forms import build_export_pdf, _export_cache_key, _cache_get, _cache_put
+
+SOURCE_PAGES = 500
+SOURCE_COUNT = 3
+FORM_PAGES = [5, 6, 7, 8, 120, 121, 250, 251, 252, 499, 500]
+ROUNDS = 5
+
+def make_source_pdf(page_count: int) -> bytes:
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i+1}", fontsize=14)
+        for line in range(40):
+            page.insert_text((72, 100 + line * 16), f"Clause {i+1}.{line+1} " + "lorem ipsum " * 6, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def pypdf2_export(sources):
+    writer = PdfWriter()
+    for document_name, pages, pdf_path in sources:
+        reader = PdfReader(pdf_path)
+        for page_num in pages:
+            index = page_num - 1
+            if 0 <= index < len(reader.pages):
+                writer.add_page(reader.pages[index])
+    output_buffer = io.BytesIO()
+    writer.write(output_buffer)
+    return output_buffer.getvalue()
+
+def timed(fn, *args):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples)
+
+def main():
+    print(f"Generating {SOURCE_COUNT} source PDFs with {SOURCE_PAGES} pages each...")
+    workdir = tempfile.mkdtemp(prefix="export_bench_")
+    sources = []
+    for i in range(SOURCE_COUNT):
+        pdf_path = os.path.join(workdir, f"doc_{i}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(make_source_pdf(SOURCE_PAGES))
+        sources.append((f"doc_{i}.pdf", FORM_PAGES, pdf_path))
+    form_data = {name: pages for name, pages, _ in sources}
+    etags = [f"etag-{i}" for i in range(SOURCE_COUNT)]
+
+    def cached_export():
+        cache_key = _export_cache_key("bench", form_data, etags)
+        data = _cache_get(cache_key)
+        if data is None:
+            data = build_export_pdf(sources)
+            _cache_put(cache_key, data)
+        return data
+
+    results = [
+        ("PyPDF2 (baseline)", timed(pypdf2_export, sources)),
+        ("PyMuPDF", timed(build_export_pdf, sources)),
+        ("PyMuPDF + cache", timed(cached_export)),
+    ]
+
+    print(f"\n{'engine':<20} {'best ms':>10} {'mean ms':>10}")
+    for name, (best, mean) in results:
+        print(f"{name:<20} {best*1000:>10.1f} {mean*1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
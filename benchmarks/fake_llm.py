@@ -0,0 +1,132 @@
+import json
+import time
+import zlib
+import base64
+import random
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One local server standing in for Groq (/openai/v1/chat/completions), DeepSeek
+# (/v1/chat/completions) and OpenAI embeddings (/v1/embeddings). Each provider gets its
+# own latency and 429 rate so retry and backoff paths are exercised; tail_rate of the requests
+# take tail_factor times longer, the long tail that request hedging targets.
+
+EMBEDDING_DIM = 64
+OCR_TEXT = "Name of Bidder: ______ Address: ______ Signature and seal of authorised signatory."
+
+PROVIDER_PATHS = {
+    "/openai/v1/chat/completions": "groq",
+    "/v1/chat/completions": "deepseek",
+    "/v1/embeddings": "openai",
+}
+
+class FakeLLMServer:
+    def __init__(self, latency: dict = None, jitter: float = 0.3, rate_429: dict = None, seed: int = 0,
+                 tail_rate: float = 0.0, tail_factor: float = 20.0):
+        self.latency = latency or {"groq": 0.25, "deepseek": 0.15, "openai": 0.1}
+        self.rate_429 = rate_429 or {}
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.requests = {provider: 0 for provider in PROVIDER_PATHS.values()}
+        self.throttled = {provider: 0 for provider in PROVIDER_PATHS.values()}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _draw(self, provider):
+        with self._lock:
+            self.requests[provider] += 1
+            throttled = self._rng.random() < self.rate_429.get(provider, 0.0)
+            if throttled:
+                self.throttled[provider] += 1
+            delay = self.latency.get(provider, 0.1) * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            if self._rng.random() < self.tail_rate:
+                delay *= self.tail_factor
+        return throttled, delay
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chat_answer(self, payload):
+                content = payload["messages"][-1]["content"]
+                text = content if isinstance(content, str) else " ".join(
+                    part.get("text", "") for part in content if part.get("type") == "text"
+                )
+                if "ONE WORD ONLY" in text:
+                    return "FORM" if ("____" in text or "Image attached" in text) else "OTHER"
+                if "Text to translate" in text:
+                    return text.split("Text to translate:", 1)[1].strip()
+                return OCR_TEXT
+
+            def _embeddings(self, payload):
+                inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+                data = []
+                for i, text in enumerate(inputs):
+                    seed = zlib.crc32(text.encode("utf-8"))
+                    vector = [((seed >> (k % 24)) & 0xFF) / 255.0 for k in range(EMBEDDING_DIM)]
+                    if payload.get("encoding_format") == "base64":
+                        embedding = base64.b64encode(struct.pack(f"{EMBEDDING_DIM}f", *vector)).decode("ascii")
+                    else:
+                        embedding = vector
+                    data.append({"object": "embedding", "index": i, "embedding": embedding})
+                tokens = sum(len(text.split()) for text in inputs)
+                return {
+                    "object": "list", "data": data, "model": payload.get("model", "fake"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+                }
+
+            def do_POST(self):
+                provider = PROVIDER_PATHS.get(self.path.split("?")[0])
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if provider is None:
+                    return self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+                throttled, delay = server._draw(provider)
+                time.sleep(delay)
+                if throttled:
+                    return self._reply(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}}, {"Retry-After": "0.2"})
+
+                if provider == "openai":
+                    return self._reply(200, self._embeddings(payload))
+
+                answer = self._chat_answer(payload)
+                self._reply(200, {
+                    "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": payload.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": answer}}],
+                    "usage": {"prompt_tokens": 200, "completion_tokens": len(answer.split()), "total_tokens": 200 + len(answer.split())}
+                })
+
+        return Handler
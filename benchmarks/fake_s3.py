@@ -0,0 +1,140 @@
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+# Minimal path-style S3 stand-in: ListObjectsV2, HeadObject and GetObject (with Range).
+# first_byte_latency and bytes_per_second emulate per-connection S3 behaviour.
+
+class FakeS3Server:
+    def __init__(self, bucket: str, first_byte_latency: float = 0.02, bytes_per_second: int = 32 * 1024 * 1024):
+        self.bucket = bucket
+        self.first_byte_latency = first_byte_latency
+        self.bytes_per_second = bytes_per_second
+        self.objects = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def put_object(self, key: str, body: bytes):
+        self.objects[key] = (body, hashlib.md5(body).hexdigest())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _split_path(self):
+                parsed = urlparse(self.path)
+                parts = unquote(parsed.path).lstrip("/").split("/", 1)
+                key = parts[1] if len(parts) > 1 else ""
+                return parts[0], key, parse_qs(parsed.query)
+
+            def _send(self, status, headers, body=b""):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self._write_throttled(body)
+
+            def _write_throttled(self, body):
+                chunk_size = 64 * 1024
+                start = time.perf_counter()
+                for offset in range(0, len(body), chunk_size):
+                    self.wfile.write(body[offset:offset + chunk_size])
+                    expected = (offset + chunk_size) / server.bytes_per_second
+                    elapsed = time.perf_counter() - start
+                    if expected > elapsed:
+                        time.sleep(expected - elapsed)
+
+            def _not_found(self):
+                body = b"<?xml version=\"1.0\"?><Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>"
+                self._send(404, {"Content-Type": "application/xml", "Content-Length": str(len(body))}, body)
+
+            def _list(self, query):
+                prefix = query.get("prefix", [""])[0]
+                contents = []
+                for key in sorted(server.objects):
+                    if key.startswith(prefix):
+                        body, md5 = server.objects[key]
+                        contents.append(
+                            f"<Contents><Key>{escape(key)}</Key><LastModified>2024-01-01T00:00:00.000Z</LastModified>"
+                            f"<ETag>&quot;{md5}&quot;</ETag><Size>{len(body)}</Size><StorageClass>STANDARD</StorageClass></Contents>"
+                        )
+                xml = (
+                    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+                    "<ListBucketResult xmlns=\"http://s3.amazonaws.com/doc/2006-03-01/\">"
+                    f"<Name>{server.bucket}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(contents)}</KeyCount>"
+                    f"<MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>{''.join(contents)}</ListBucketResult>"
+                ).encode("utf-8")
+                self._send(200, {"Content-Type": "application/xml", "Content-Length": str(len(xml))}, xml)
+
+            def _object(self, key):
+                if key not in server.objects:
+                    return self._not_found()
+
+                body, md5 = server.objects[key]
+                headers = {
+                    "ETag": f"\"{md5}\"",
+                    "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                    "Content-Type": "application/pdf",
+                    "Accept-Ranges": "bytes",
+                }
+                if_match = self.headers.get("If-Match")
+                if if_match and if_match.strip('"') != md5:
+                    return self._send(412, {"Content-Length": "0"})
+
+                status = 200
+                byte_range = self.headers.get("Range")
+                if byte_range and self.command == "GET":
+                    start, end = byte_range.replace("bytes=", "").split("-")
+                    start, end = int(start), min(int(end), len(body) - 1)
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                    body = body[start:end + 1]
+                    status = 206
+
+                headers["Content-Length"] = str(len(body))
+                self._send(status, headers, body)
+
+            def _handle(self):
+                with server._lock:
+                    server.request_count += 1
+                time.sleep(server.first_byte_latency)
+
+                bucket, key, query = self._split_path()
+                if bucket != server.bucket:
+                    return self._not_found()
+                if not key and "list-type" in query:
+                    return self._list(query)
+                return self._object(key)
+
+            def do_GET(self):
+                self._handle()
+
+            def do_HEAD(self):
+                self._handle()
+
+        return Handler
@@ -0,0 +1,81 @@
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_llm import FakeLLMServer
+
+# Hedging and failover against local fake endpoints, each backend its own FakeLLMServer.
+#   tail:     two backends with a 2% x20 latency tail, hedging off vs on
+#   failover: the primary answers every request with 429, the secondary is healthy
+#
+#   python -m benchmarks.llm_hedge_bench --calls 400
+
+CONCURRENCY = 10
+PAYLOAD = {"messages": [{"role": "user", "content": "Text to translate: Name of Bidder"}], "temperature": 0.0}
+
+def _backend(name, server):
+    return {"name": name, "url": f"{server.base_url}/v1/chat/completions", "model": "fake", "api_key": "bench"}
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+def _run(pool, calls):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            pool.complete(PAYLOAD)
+            return time.perf_counter() - start, True
+        except Exception:
+            return time.perf_counter() - start, False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        results = list(executor.map(one, range(calls)))
+    wall = time.perf_counter() - start
+    latencies = [seconds for seconds, _ in results]
+    return {
+        "ok": sum(ok for _, ok in results),
+        "wall": wall,
+        "p50": _percentile(latencies, 50),
+        "p99": _percentile(latencies, 99),
+        "max": max(latencies),
+    }
+
+def _report(label, stats, servers, calls):
+    sent = sum(sum(server.requests.values()) for server in servers)
+    print(
+        f"{label:<24} ok {stats['ok']:>4}/{calls}  wall {stats['wall']:>6.2f}s  p50 {stats['p50']:.3f}s  "
+        f"p99 {stats['p99']:.3f}s  max {stats['max']:.3f}s  requests/call {sent / calls:.2f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM hedging and failover benchmark")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--tail-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    from utils.llm_utils import BackendPool
+
+    print(f"{args.calls} calls, {CONCURRENCY} concurrent")
+    for label, budget in (("tail, hedging off", 0.0), ("tail, hedging on", 0.1)):
+        servers = [
+            FakeLLMServer(latency={"deepseek": 0.15}, tail_rate=args.tail_rate, seed=1).start(),
+            FakeLLMServer(latency={"deepseek": 0.15}, tail_rate=args.tail_rate, seed=2).start(),
+        ]
+        pool = BackendPool("bench", [_backend("a", servers[0]), _backend("b", servers[1])], hedge_budget=budget)
+        _report(label, _run(pool, args.calls), servers, args.calls)
+        for server in servers:
+            server.stop()
+
+    servers = [
+        FakeLLMServer(latency={"deepseek": 0.05}, rate_429={"deepseek": 1.0}, seed=1).start(),
+        FakeLLMServer(latency={"deepseek": 0.15}, seed=2).start(),
+    ]
+    pool = BackendPool("bench", [_backend("down", servers[0]), _backend("up", servers[1])])
+    _report("failover", _run(pool, args.calls), servers, args.calls)
+    print(f"{'':<24} requests to down backend: {servers[0].requests['deepseek']}, to healthy: {servers[1].requests['deepseek']}")
+    for server in servers:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
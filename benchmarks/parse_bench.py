@@ -0,0 +1,83 @@
+import os
+import time
+import shutil
+import tempfile
+import argparse
+
+# Parse CPU per tender: the previous per-pipeline parsers (PyPDF2 + two fitz get_text calls
+# in extract_forms, pdfplumber in request_analysis) against the shared page-extraction engine,
+# cold and with the page cache warm. One tender = DOCS_PER_TENDER documents seen by both pipelines.
+#
+#   python -m benchmarks.parse_bench --kind mixed --pages 60
+
+DOCS_PER_TENDER = 2
+LEGACY_BATCH_SIZE = 20
+
+def legacy_extract_forms(pdf_path):
+    import fitz
+    from PyPDF2 import PdfReader
+    PdfReader(pdf_path)
+    doc = fitz.open(pdf_path)
+    for page in doc:
+        page.get_text()
+        len((page.get_text() or "").strip()) < 10
+    doc.close()
+
+def legacy_request_analysis(pdf_path):
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+    for start in range(0, total_pages, LEGACY_BATCH_SIZE):
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:start + LEGACY_BATCH_SIZE]:
+                if len((page.extract_text() or "").strip()) < 10:
+                    continue
+                for table in page.find_tables():
+                    table.extract()
+                page.extract_words()
+
+def engine_both(pdf_path):
+    from utils.page_extraction import iter_pages, document_info, extract_document
+    for _ in iter_pages(pdf_path):  # extract_forms
+        pass
+    total_pages = document_info(pdf_path)["page_count"]  # request_analysis, batch by batch
+    for start in range(0, total_pages, LEGACY_BATCH_SIZE):
+        extract_document(pdf_path, start, start + LEGACY_BATCH_SIZE)
+
+def cpu_seconds(fn, paths):
+    start = time.process_time()
+    for path in paths:
+        fn(path)
+    return time.process_time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse CPU per tender")
+    parser.add_argument("--kind", default="mixed", choices=("text", "table", "scanned", "mixed"))
+    parser.add_argument("--pages", type=int, default=60)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="parse_bench_")
+    os.environ["PDF_CACHE_DIR"] = os.path.join(workdir, "cache")
+    from benchmarks.synthetic_pdfs import make_pdf
+
+    paths = []
+    for d in range(DOCS_PER_TENDER):
+        path = os.path.join(workdir, f"doc_{d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf(args.kind, args.pages, seed=d))
+        paths.append(path)
+
+    legacy_forms = cpu_seconds(legacy_extract_forms, paths)
+    legacy_analysis = cpu_seconds(legacy_request_analysis, paths)
+    engine_cold = cpu_seconds(engine_both, paths)
+    engine_warm = cpu_seconds(engine_both, paths)
+
+    legacy = legacy_forms + legacy_analysis
+    print(f"{args.kind}, {DOCS_PER_TENDER} x {args.pages} pages, CPU seconds per tender")
+    print(f"  before: extract_forms {legacy_forms:.2f} + request_analysis {legacy_analysis:.2f} = {legacy:.2f}")
+    print(f"  after:  engine cold {engine_cold:.2f} ({legacy / engine_cold:.1f}x), cache warm {engine_warm:.2f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
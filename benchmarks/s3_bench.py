@@ -0,0 +1,104 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+
+BUCKET = "bench-bucket"
+TENDER_COUNT = 24
+SMALL_DOCS_PER_TENDER = 4
+SMALL_DOC_BYTES = 1 * 1024 * 1024
+LARGE_DOC_BYTES = 48 * 1024 * 1024
+LARGE_DOC_EVERY = 4  # one large document in every Nth tender
+
+def configure_env(endpoint_url: str, cache_dir: str):
+    # must run before config / utils.s3_utils are imported
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_REGION": "us-east-1",
+        "S3_BUCKET": BUCKET,
+        "S3_ENDPOINT_URL": endpoint_url,
+        "PDF_CACHE_DIR": cache_dir,
+    })
+
+def populate(server):
+    small = os.urandom(SMALL_DOC_BYTES)
+    large = os.urandom(LARGE_DOC_BYTES)
+    prefixes = []
+    for t in range(TENDER_COUNT):
+        prefix = f"tender-documents/bench-{t}/"
+        prefixes.append(prefix)
+        for d in range(SMALL_DOCS_PER_TENDER):
+            server.put_object(f"{prefix}doc_{d}.pdf", small)
+        if t % LARGE_DOC_EVERY == 0:
+            server.put_object(f"{prefix}large.pdf", large)
+    return prefixes
+
+async def baseline(prefixes):
+    # previous access pattern: default 10-connection client, sequential listing, one GET per object
+    import boto3
+    from io import BytesIO
+    from botocore.config import Config
+    client = boto3.client(
+        "s3", aws_access_key_id="bench", aws_secret_access_key="bench", region_name="us-east-1",
+        endpoint_url=os.environ["S3_ENDPOINT_URL"], config=Config(s3={"addressing_style": "path"})
+    )
+
+    def _list(prefix):
+        keys = []
+        for page in client.get_paginator("list_objects_v2").paginate(Bucket=BUCKET, Prefix=prefix):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        return keys
+
+    def _fetch(key):
+        return BytesIO(client.get_object(Bucket=BUCKET, Key=key)["Body"].read())
+
+    start = time.perf_counter()
+    keys = []
+    for prefix in prefixes:
+        keys.extend(await asyncio.to_thread(_list, prefix))
+    list_seconds = time.perf_counter() - start
+
+    results = await asyncio.gather(*(asyncio.to_thread(_fetch, key) for key in keys))
+    total_seconds = time.perf_counter() - start
+    return list_seconds, total_seconds, sum(len(r.getvalue()) for r in results)
+
+async def tuned(prefixes):
+    from utils.s3_utils import list_s3_pdf_objects_many, fetch_pdf_file
+
+    start = time.perf_counter()
+    listing = await list_s3_pdf_objects_many(prefixes)
+    list_seconds = time.perf_counter() - start
+
+    objects = [obj for objs in listing.values() for obj in objs]
+    paths = await asyncio.gather(*(fetch_pdf_file(obj["key"], obj["etag"], obj["size"]) for obj in objects))
+    total_seconds = time.perf_counter() - start
+    return list_seconds, total_seconds, sum(os.path.getsize(p) for p in paths)
+
+def main():
+    from benchmarks.fake_s3 import FakeS3Server
+
+    server = FakeS3Server(BUCKET).start()
+    cache_dir = tempfile.mkdtemp(prefix="s3_bench_cache_")
+    configure_env(server.endpoint_url, cache_dir)
+    prefixes = populate(server)
+    print(f"Fake S3 at {server.endpoint_url}: {len(server.objects)} objects across {len(prefixes)} tenders")
+
+    try:
+        rows = []
+        for name, fn in (("baseline", baseline), ("tuned", tuned)):
+            server.request_count = 0
+            list_seconds, total_seconds, total_bytes = asyncio.run(fn(prefixes))
+            rows.append((name, list_seconds, total_seconds, total_bytes, server.request_count))
+
+        print(f"\n{'variant':<10} {'list s':>8} {'total s':>8} {'MB/s':>8} {'requests':>9}")
+        for name, list_seconds, total_seconds, total_bytes, requests in rows:
+            mb_per_second = total_bytes / 1024 / 1024 / total_seconds
+            print(f"{name:<10} {list_seconds:>8.2f} {total_seconds:>8.2f} {mb_per_second:>8.1f} {requests:>9}")
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import random
+from datetime import datetime, timedelta, timezone
+from tender_scheduler import tender_priority, run_schedule
+
+TENDER_COUNT = 200
+CLUSTER_PAGES_PER_SECOND = 20.0   # shared Groq/DeepSeek capacity
+TENDER_PAGES_PER_SECOND = 2.0     # one tender's documents are processed one after another
+TARGET_PAGES_IN_FLIGHT = 1500
+BASELINE_WORKERS = 4
+POLL_SECONDS = 5
+SEED = 7
+
+class SimulatedCluster:
+    # processor sharing: in-flight tenders split the cluster rate, each capped at its own pipeline rate
+
+    def __init__(self):
+        self.now = 0.0
+        self.running = {}
+        self.finished = {}
+        self.finish_times = {}
+        self._next_id = 0
+
+    def clock(self):
+        return self.now
+
+    def submit(self, task):
+        self._next_id += 1
+        job_id = str(self._next_id)
+        self.running[job_id] = [float(task["true_pages"]), task]
+        return job_id
+
+    def sleep(self, seconds):
+        end = self.now + seconds
+        while self.running and self.now < end:
+            rate = min(TENDER_PAGES_PER_SECOND, CLUSTER_PAGES_PER_SECOND / len(self.running))
+            step = min(end - self.now, min(remaining for remaining, _ in self.running.values()) / rate)
+            self.now += step
+            for job_id in list(self.running):
+                self.running[job_id][0] -= rate * step
+                if self.running[job_id][0] <= 1e-9:
+                    _, task = self.running.pop(job_id)
+                    self.finished[job_id] = task
+                    self.finish_times[task["tender_id"]] = self.now
+        self.now = end
+
+    def poll(self, job_ids):
+        done = []
+        for job_id in job_ids:
+            if job_id in self.finished:
+                task = self.finished.pop(job_id)
+                done.append({"job_id": job_id, "report": {"tender_id": task["tender_id"]}})
+        return done
+
+def make_workload(rng, now):
+    tenders = []
+    for i in range(TENDER_COUNT):
+        bucket = rng.random()
+        if bucket < 0.85:
+            pages = rng.randint(20, 200)
+        elif bucket < 0.95:
+            pages = rng.randint(300, 800)
+        else:
+            pages = rng.randint(2000, 3000)
+        tenders.append({
+            "tender_id": f"sim-{i}",
+            "tender_value": rng.uniform(2e9, 5e10),
+            "deadline": now + timedelta(days=rng.uniform(1, 45)),
+            "true_pages": pages,
+            "est_pages": max(1, int(pages * rng.uniform(0.7, 1.3)))  # byte-based estimate is noisy
+        })
+    return tenders
+
+def simulate(tasks, target_pages):
+    cluster = SimulatedCluster()
+    _, stats = run_schedule(
+        tasks, cluster.submit, cluster.poll, target_pages,
+        poll_seconds=POLL_SECONDS, clock=cluster.clock, sleep=cluster.sleep
+    )
+    return stats, cluster.finish_times
+
+def main():
+    import builtins
+    rng = random.Random(SEED)
+    now = datetime.now(timezone.utc)
+    tenders = make_workload(rng, now)
+
+    # baseline: Mongo order, a fixed number of tenders in flight
+    baseline_tasks = [dict(t, est_pages=1) for t in tenders]
+
+    scheduled_tasks = [dict(t) for t in tenders]
+    for task in scheduled_tasks:
+        task["priority"] = tender_priority(task, now)
+    scheduled_tasks.sort(key=lambda t: t["priority"], reverse=True)
+
+    quiet_print, builtins.print = builtins.print, lambda *args, **kwargs: None
+    try:
+        runs = [
+            ("fifo x4 tenders", simulate(baseline_tasks, BASELINE_WORKERS)),
+            ("scheduler", simulate(scheduled_tasks, TARGET_PAGES_IN_FLIGHT)),
+        ]
+    finally:
+        builtins.print = quiet_print
+
+    urgent = {t["tender_id"] for t in tenders if (t["deadline"] - now).days < 7}
+    print(f"{TENDER_COUNT} tenders, {sum(t['true_pages'] for t in tenders)} pages, {len(urgent)} due within 7 days\n")
+    print(f"{'policy':<16} {'makespan s':>11} {'mean wait s':>12} {'p95 wait s':>11} {'urgent done s':>14}")
+    for name, (stats, finish_times) in runs:
+        urgent_done = sum(finish_times[t] for t in urgent) / max(len(urgent), 1)
+        print(
+            f"{name:<16} {stats['makespan_seconds']:>11.0f} {stats['mean_queue_wait_seconds']:>12.0f} "
+            f"{stats['p95_queue_wait_seconds']:>11.0f} {urgent_done:>14.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import subprocess
+
+# Cold start of each ASGI app: import time and RSS of a fresh worker process after importing
+# the app module, plus which heavy libraries that import dragged in. Every uvicorn/gunicorn
+# worker pays this once. No network is touched; MONGO_URI points at a closed port.
+#
+#   python -m benchmarks.startup_bench
+
+APPS = ("extract_forms_server", "request_analysis_server", "export_forms", "download_documents")
+HEAVY_MODULES = ("fitz", "pdfplumber", "PyPDF2", "openai", "groq", "boto3", "pymongo", "PIL.Image")
+ROUNDS = 5
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+with open("/proc/self/status") as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module):
+    env = dict(
+        os.environ, MONGO_URI="mongodb://127.0.0.1:1", AWS_REGION="us-east-1", DB_NAME="bench",
+        TENDERS_COLLECTION="tenders", VECTOR_COLLECTION="vectors", DOCS_STATUS_COLLECTION="docs_status"
+    )
+    samples = []
+    for _ in range(ROUNDS):
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, env=env, check=True
+        )
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    samples.sort(key=lambda s: s["seconds"])
+    return samples[len(samples) // 2]
+
+def main():
+    print(f"{'app':<26} {'import s':>9} {'RSS MB':>7}  heavy modules loaded")
+    for module in APPS:
+        result = measure(module)
+        print(f"{module:<26} {result['seconds']:>9.2f} {result['rss_mb']:>7.0f}  {', '.join(result['loaded']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import fitz
+
+# Synthetic tender documents. "text" and "table" pages carry a text layer, "scanned" pages
+# are a rasterised image only (what is_scanned_page detects), "mixed" cycles through all three.
+
+PAGE_KINDS = ("text", "table", "scanned")
+WORDS = (
+    "tender contractor bid security clause annexure schedule works supply installation commissioning "
+    "pipeline pumping station transformer substation earthwork payment guarantee completion period "
+    "specification drawing quantity rate amount signature seal authorised signatory date place"
+).split()
+
+def _sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+def _draw_text_page(page, rng, page_num):
+    y = 60
+    page.insert_text((60, y), f"Section {page_num}: General Conditions", fontsize=13)
+    y += 28
+    for _ in range(34):
+        page.insert_text((60, y), _sentence(rng, 12), fontsize=9)
+        y += 18
+    if page_num % 4 == 0:
+        for label in ("Name of Bidder", "Address", "Signature", "Seal"):
+            page.insert_text((60, y), f"{label}: ________________________", fontsize=10)
+            y += 20
+
+def _draw_table_page(page, rng, page_num):
+    page.insert_text((60, 60), f"Schedule {page_num}: Bill of Quantities", fontsize=13)
+    cols = [60, 100, 300, 380, 460, 540]
+    top, row_height, rows = 90, 22, 28
+    for r in range(rows + 1):
+        y = top + r * row_height
+        page.draw_line((cols[0], y), (cols[-1], y))
+    for x in cols:
+        page.draw_line((x, top), (x, top + rows * row_height))
+    headers = ("No", "Description", "Unit", "Qty", "Rate")
+    for c, header in enumerate(headers):
+        page.insert_text((cols[c] + 4, top + 15), header, fontsize=9)
+    for r in range(1, rows):
+        y = top + r * row_height + 15
+        cells = (str(r), _sentence(rng, 3)[:32], rng.choice(("m", "kg", "nos", "cum")), str(rng.randint(1, 900)), "")
+        for c, text in enumerate(cells):
+            page.insert_text((cols[c] + 4, y), text, fontsize=8)
+
+def _draw_scanned_page(page, rng, page_num):
+    scratch = fitz.open()
+    source = scratch.new_page()
+    _draw_text_page(source, rng, page_num)
+    pix = source.get_pixmap(dpi=110, colorspace=fitz.csGRAY)
+    page.insert_image(page.rect, stream=pix.tobytes("jpeg", jpg_quality=60))
+    scratch.close()
+
+def make_pdf(kind: str, page_count: int, seed: int = 0) -> bytes:
+    rng = random.Random(f"{kind}-{page_count}-{seed}")
+    doc = fitz.open()
+    for i in range(page_count):
+        page_kind = PAGE_KINDS[i % len(PAGE_KINDS)] if kind == "mixed" else kind
+        page = doc.new_page()
+        if page_kind == "text":
+            _draw_text_page(page, rng, i + 1)
+        elif page_kind == "table":
+            _draw_table_page(page, rng, i + 1)
+        else:
+            _draw_scanned_page(page, rng, i + 1)
+    data = doc.tobytes(garbage=1, deflate=True)
+    doc.close()
+    return data
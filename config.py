@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,10 +8,17 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION")
 S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 64))
+S3_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+S3_LIST_CONCURRENCY = 16
+S3_MAX_CONCURRENT_DOWNLOADS = 16
 
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBEDDING_MODEL = "text-embedding-3-large"  
 
@@ -19,11 +27,57 @@ DB_NAME = os.getenv("DB_NAME")
 TENDERS_COLLECTION = os.getenv("TENDERS_COLLECTION")
 VECTOR_COLLECTION = os.getenv("VECTOR_COLLECTION")
 DOCS_STATUS_COLLECTION = os.getenv("DOCS_STATUS_COLLECTION")
+TENDER_DEADLINE_FIELD = os.getenv("TENDER_DEADLINE_FIELD", "deadline")
+JOBS_COLLECTION = os.getenv("JOBS_COLLECTION", "jobs")
 
 BATCH_SIZE = 2048
 MAX_PROCESSES_GROQ = 5
 MAX_PROCESSES_DEEPSEEK = 10
 
+# OpenAI-compatible chat backends in failover order; override with a JSON list of
+# {"name", "url", "model", "api_key_env"} objects
+LLM_VISION_BACKENDS = json.loads(os.getenv("LLM_VISION_BACKENDS", "null")) or [
+    {"name": "groq", "url": f"{GROQ_BASE_URL}/openai/v1/chat/completions", "model": "meta-llama/llama-4-scout-17b-16e-instruct", "api_key_env": "GROQ_API_KEY"},
+    {"name": "groq-maverick", "url": f"{GROQ_BASE_URL}/openai/v1/chat/completions", "model": "meta-llama/llama-4-maverick-17b-128e-instruct", "api_key_env": "GROQ_API_KEY"},
+]
+LLM_TEXT_BACKENDS = json.loads(os.getenv("LLM_TEXT_BACKENDS", "null")) or [
+    {"name": "deepseek", "url": DEEPSEEK_API_URL, "model": "deepseek-chat", "api_key_env": "DEEPSEEK_API_KEY"},
+]
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", 256))
+LLM_MAX_ATTEMPTS = 4
+LLM_MIN_TIMEOUT = 10.0
+LLM_MAX_TIMEOUT = 120.0
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 8.0
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", 0.1))
+LLM_HEDGE_DEFAULT_DELAY = 5.0
+LLM_HEDGE_MIN_DELAY = 0.05
+LLM_BREAKER_FAILURES = 5
+LLM_BREAKER_COOLDOWN = 30.0
+
+MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", 512))
+MIN_PAGE_BATCH = 1
+MAX_PAGE_BATCH = 50
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 8))  # per server worker process
+JOB_LEASE_SECONDS = 300
+JOB_POLL_SECONDS = 5
+JOB_MAX_ATTEMPTS = 3
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = 5
+
+EST_BYTES_PER_PAGE = 100 * 1024
+DEADLINE_HORIZON_DAYS = 14
+TENDER_PAGE_WINDOW = 200
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "/tmp/extract_forms_pdf_cache")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 10 * 1024 * 1024 * 1024))
+PDF_CACHE_MIN_AGE_SECONDS = 3600
+PREFETCH_MAX_DOCS = int(os.getenv("PREFETCH_MAX_DOCS", 2))
+PREFETCH_MAX_BYTES = int(os.getenv("PREFETCH_MAX_BYTES", 512 * 1024 * 1024))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
 GROQ_OCR_PROMPT = """
                   Extract all text from this scanned page exactly as it appears on the page.
                   - Do NOT summarize, interpret, or add any commentary.
@@ -1,31 +1,42 @@
 import asyncio
 import zipfile
 from io import BytesIO
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
-from s3_utils import list_s3_pdfs, fetch_pdf  
+from utils.clients import close_clients
+from utils.s3_utils import list_s3_pdf_objects, fetch_pdf_file
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    close_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 async def build_zip_stream_for_tender(tender_id: str):
     prefix = f"tender-documents/{tender_id}/"
-    pdf_keys = await list_s3_pdfs(prefix)  # async
+    pdf_objects = await list_s3_pdf_objects(prefix)
 
-    if not pdf_keys:
+    if not pdf_objects:
         raise HTTPException(status_code=404, detail="No PDFs found for this tender")
 
     zip_buffer = BytesIO()
 
-    async def fetch_and_add(key):
-        file_bytes = await fetch_pdf(key)  
+    async def fetch_and_add(pdf_object):
+        key = pdf_object["key"]
+        pdf_path = await fetch_pdf_file(key, pdf_object["etag"], pdf_object["size"])
         relative_path = key[len(prefix):] if key.startswith(prefix) else key
-        return relative_path, file_bytes
+        return relative_path, pdf_path
+
+    results = await asyncio.gather(*(fetch_and_add(obj) for obj in pdf_objects))
 
-    results = await asyncio.gather(*(fetch_and_add(key) for key in pdf_keys))
+    def _write_zip():
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+            for relative_path, pdf_path in results:
+                zipf.write(pdf_path, relative_path)
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for relative_path, file_bytes in results:
-            zipf.writestr(relative_path, file_bytes)
+    await asyncio.to_thread(_write_zip)
 
     zip_buffer.seek(0)
     return zip_buffer
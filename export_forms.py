@@ -1,15 +1,91 @@
 import io
+import json
 import asyncio
-from PyPDF2 import PdfReader, PdfWriter
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
-from s3_utils import fetch_pdf  
+from config import EXPORT_CACHE_MAX_BYTES
+from utils.pdf_cache import pdf_view
+from utils.metrics import timed, inc
+from utils.clients import close_clients
+from utils.s3_utils import fetch_pdf_file, head_pdf_object
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    close_clients()
+
+app = FastAPI(lifespan=lifespan)
+
+_export_cache = OrderedDict()
+_export_cache_bytes = 0
+
+def _page_ranges(pages, page_count, document_name):
+    ranges = []
+    for page_num in pages:
+        index = page_num - 1
+        if index < 0 or index >= page_count:
+            print(f"⚠️ Invalid page {page_num} in {document_name}")
+            continue
+
+        if ranges and ranges[-1][1] + 1 == index:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ranges
+
+def _export_cache_key(tender_id: str, form_data: dict, etags: list):
+    selection = [(document_name, pages) for document_name, pages in form_data.items() if pages]
+    raw = json.dumps([tender_id, selection, etags])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _cache_get(cache_key):
+    data = _export_cache.get(cache_key)
+    if data is not None:
+        _export_cache.move_to_end(cache_key)
+    return data
+
+def _cache_put(cache_key, data: bytes):
+    global _export_cache_bytes
+    if len(data) > EXPORT_CACHE_MAX_BYTES:
+        return
+
+    # two concurrent misses on the same selection both store it: replace, don't count it twice
+    previous = _export_cache.pop(cache_key, None)
+    if previous is not None:
+        _export_cache_bytes -= len(previous)
+    _export_cache[cache_key] = data
+    _export_cache_bytes += len(data)
+    while _export_cache_bytes > EXPORT_CACHE_MAX_BYTES:
+        _, evicted = _export_cache.popitem(last=False)
+        _export_cache_bytes -= len(evicted)
+
+def build_export_pdf(sources: list) -> bytes:
+    with timed("export_build"):
+        return _build_export_pdf(sources)
+
+def _build_export_pdf(sources: list) -> bytes:
+    import fitz
+    output = fitz.open()
+
+    for document_name, pages, pdf_path in sources:
+        with pdf_view(pdf_path) as view:
+            with fitz.open(stream=view, filetype="pdf") as src:
+                for from_page, to_page in _page_ranges(pages, src.page_count, document_name):
+                    output.insert_pdf(src, from_page=from_page, to_page=to_page)
+
+    # fitz cannot save an empty document: no valid page in the selection
+    if output.page_count == 0:
+        output.close()
+        return None
+
+    data = output.tobytes(garbage=1, deflate=True)
+    output.close()
+    return data
 
 async def export_form_pages_pdf(tender_id: str, form_data: dict):
-    writer = PdfWriter()
-    tasks = []
     keys = []
 
     for document_name, pages in form_data.items():
@@ -17,29 +93,44 @@ async def export_form_pages_pdf(tender_id: str, form_data: dict):
             continue
 
         s3_key = f"tender-documents/{tender_id}/{document_name}"
-        tasks.append(fetch_pdf(s3_key))
-        keys.append((document_name, pages))
+        keys.append((document_name, pages, s3_key))
+
+    if not keys:
+        raise HTTPException(400, "No pages selected")
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    heads = await asyncio.gather(*(head_pdf_object(s3_key) for _, _, s3_key in keys), return_exceptions=True)
 
-    for (document_name, pages), pdf_bytes in zip(keys, results):
-        if isinstance(pdf_bytes, Exception):
+    for (document_name, _, _), head in zip(keys, heads):
+        if isinstance(head, Exception):
             raise HTTPException(404, f"File not found or fetch error: {document_name}")
 
-        reader = PdfReader(pdf_bytes)
+    etags = [head["etag"] for head in heads]
 
-        for page_num in pages:
-            index = page_num - 1
-            if index < 0 or index >= len(reader.pages):
-                print(f"⚠️ Invalid page {page_num} in {document_name}")
-                continue
+    cache_key = _export_cache_key(tender_id, form_data, etags)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        inc("cache_hits_total", cache="export")
+        print(f"⚡ Export cache hit for tender {tender_id}")
+        return io.BytesIO(cached)
 
-            writer.add_page(reader.pages[index])
+    inc("cache_misses_total", cache="export")
+
+    results = await asyncio.gather(
+        *(fetch_pdf_file(head["key"], head["etag"], head["size"]) for head in heads),
+        return_exceptions=True
+    )
+
+    sources = []
+    for (document_name, pages, _), pdf_path in zip(keys, results):
+        if isinstance(pdf_path, Exception):
+            raise HTTPException(404, f"File not found or fetch error: {document_name}")
+        sources.append((document_name, pages, pdf_path))
 
-    output_buffer = io.BytesIO()
-    writer.write(output_buffer)
-    output_buffer.seek(0)
-    return output_buffer
+    data = await asyncio.to_thread(build_export_pdf, sources)
+    if data is None:
+        raise HTTPException(400, "None of the selected pages exist in the documents")
+    _cache_put(cache_key, data)
+    return io.BytesIO(data)
 
 @app.post("/export_forms/{tender_id}")
 async def export_forms(tender_id: str, form_pages: dict):
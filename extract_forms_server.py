@@ -1,15 +1,31 @@
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import time
 import asyncio
 import requests
-from io import BytesIO
-from PyPDF2 import PdfReader, PdfWriter
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from utils.s3_utils import list_s3_pdfs, fetch_pdf
+from fastapi.responses import PlainTextResponse
+from utils.s3_utils import list_s3_pdf_objects, prefetch_pdfs
+from utils.job_utils import make_job_router, start_job_workers, stop_job_workers
+from utils.metrics import timed, observe, observe_stage, begin_tender_timings, snapshot_timings, render_metrics, run_metrics_flusher
+from utils.clients import close_clients
 from extract_forms.pdf_processing import extract_form_pages 
 from utils.mongo_utils import is_form_complete, mark_form_complete, get_forms
 
-app = FastAPI()
+JOB_KIND = "extract_forms"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = start_job_workers(JOB_KIND, process_single_tender)
+    flusher = asyncio.create_task(run_metrics_flusher())
+    yield
+    await stop_job_workers(workers)
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+    close_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:8080",
@@ -28,11 +44,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(make_job_router(JOB_KIND))
+
 async def process_single_tender(tender_id: str):
     print(f"\n===============================")
     print(f"▶ START tender: {tender_id}")
     print(f"===============================")
 
+    tender_start = time.perf_counter()
+    timings = begin_tender_timings()
+
     report = {
         "tender_id": tender_id,
         "processed_docs": 0,
@@ -40,6 +61,7 @@ async def process_single_tender(tender_id: str):
         "scanned_pages": 0,
         "regular_pages": 0,
         "total_page_errors": 0,  
+        "s3_wait_seconds": 0.0,
         "errors": [],
         "forms": {}  
     }
@@ -47,21 +69,31 @@ async def process_single_tender(tender_id: str):
     s3_prefix = f"tender-documents/{tender_id}/"
     print(f"📂 Fetching S3 PDFs from prefix: {s3_prefix}")
 
-    pdf_keys = await list_s3_pdfs(s3_prefix)
-    print(f"📄 Found {len(pdf_keys)} PDFs")
+    with timed("s3_list"):
+        pdf_objects = await list_s3_pdf_objects(s3_prefix)
+    print(f"📄 Found {len(pdf_objects)} PDFs")
 
-    for pdf_key in pdf_keys:
-        document_name = os.path.basename(pdf_key)
-        print(f"📄 Document: {document_name}")
-
-        if await asyncio.to_thread(is_form_complete, tender_id, document_name):
-            print(f"⏩ Already processed, skipping")
+    pending_objects = []
+    for pdf_object in pdf_objects:
+        document_name = os.path.basename(pdf_object["key"])
+        with timed("mongo"):
+            already_complete = await asyncio.to_thread(is_form_complete, tender_id, document_name)
+        if already_complete:
+            print(f"⏩ Already processed, skipping {document_name}")
             report["skipped_docs"] += 1
             continue
+        pending_objects.append(pdf_object)
+
+    async for pdf_object, pdf_path, s3_wait in prefetch_pdfs(pending_objects):
+        document_name = os.path.basename(pdf_object["key"])
+        print(f"📄 Document: {document_name}")
+        report["s3_wait_seconds"] += s3_wait
+        observe_stage("s3_wait", s3_wait)
 
         try:
-            pdf_bytes = await fetch_pdf(pdf_key)
-            form_pages, scanned_count, regular_count, page_errors = await extract_form_pages(pdf_bytes, document_name)
+            if isinstance(pdf_path, Exception):
+                raise pdf_path
+            form_pages, scanned_count, regular_count, page_errors = await extract_form_pages(pdf_path, document_name)
             report["scanned_pages"] += scanned_count
             report["regular_pages"] += regular_count
             report["total_page_errors"] += page_errors
@@ -71,7 +103,8 @@ async def process_single_tender(tender_id: str):
                 report["errors"].append(f"{document_name} aborted due to {page_errors} page errors")
                 continue
 
-            await asyncio.to_thread(mark_form_complete, tender_id, document_name, form_pages)
+            with timed("mongo"):
+                await asyncio.to_thread(mark_form_complete, tender_id, document_name, form_pages)
             report["processed_docs"] += 1
 
             if page_errors > 0:
@@ -81,12 +114,22 @@ async def process_single_tender(tender_id: str):
             print(f"❌ Error processing {document_name}: {e}")
             report["errors"].append(f"{document_name}: {str(e)}")
             
-    forms_data = await asyncio.to_thread(get_forms, tender_id)
+    with timed("mongo"):
+        forms_data = await asyncio.to_thread(get_forms, tender_id)
     report["forms"] = forms_data
+    report["s3_wait_seconds"] = round(report["s3_wait_seconds"], 3)
+    tender_seconds = time.perf_counter() - tender_start
+    observe("processing_seconds", tender_seconds, pipeline="extract_forms")
+    report["timings"] = snapshot_timings(timings)
+    report["timings"]["total"] = round(tender_seconds, 3)
     print(f"\n✅ Finished tender {tender_id}")
     print(f"📊 Report: {report}")
     return report
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def route_metrics():
+    return render_metrics()
+
 @app.post("/process/{tender_id}")
 async def route_process(tender_id: str):
     print(f"\n🌐 API CALL → /process/{tender_id}")
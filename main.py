@@ -1,52 +1,61 @@
+import asyncio
 import requests
-from utils.mongo_utils import get_tender_ids
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from tender_scheduler import build_tasks, run_schedule
+from utils.s3_utils import list_s3_pdf_objects_many
+from utils.mongo_utils import get_tenders, get_completed_documents
 
-SERVER_URL = "http://127.0.0.1:8000/process/"
+SERVER_URL = "http://127.0.0.1:8000"
 MIN_VALUE = 2000000000
-MAX_WORKERS = 4  
-
-def process_tender(tender_id):
-    url = SERVER_URL + tender_id
-    print(f"▶ Starting tender {tender_id}")
-
-    try:
-        resp = requests.post(url, timeout=None)
-        if resp.status_code != 200:
-            print(f"❌ Tender {tender_id} failed (HTTP {resp.status_code})")
-            return {"tender_id": tender_id, "error": f"HTTP {resp.status_code}"}
-
-        print(f"✔ Finished tender {tender_id}")
-        return resp.json()
-
-    except Exception as e:
-        print(f"❌ Tender {tender_id} error: {e}")
-        return {"tender_id": tender_id, "error": str(e)}
+TARGET_PAGES_IN_FLIGHT = 1500
+POLL_SECONDS = 10
+STATUS_CHUNK = 100
+
+def submit_tender(task):
+    resp = requests.post(
+        f"{SERVER_URL}/jobs",
+        json={"tender_ids": [task["tender_id"]], "priority": task["rank"]},
+        timeout=60
+    )
+    resp.raise_for_status()
+    return resp.json()["jobs"][0]["job_id"]
+
+def poll_finished(job_ids):
+    finished = []
+    for i in range(0, len(job_ids), STATUS_CHUNK):
+        chunk = job_ids[i:i+STATUS_CHUNK]
+        try:
+            resp = requests.get(f"{SERVER_URL}/jobs", params={"ids": ",".join(chunk)}, timeout=60)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"❌ Status poll error: {e}")
+            continue
+
+        for job in resp.json()["jobs"]:
+            if job["status"] == "done":
+                print(f"✔ Finished tender {job['tender_id']}")
+                finished.append(job)
+            elif job["status"] == "failed":
+                print(f"❌ Tender {job['tender_id']} failed: {job['error']}")
+                finished.append({**job, "report": {"tender_id": job["tender_id"], "error": job["error"]}})
+    return finished
 
 def main():
-    print("Fetching tender IDs...")
-    tender_ids = get_tender_ids(MIN_VALUE)
+    print("Fetching tenders...")
+    tenders = get_tenders(MIN_VALUE)
+    tender_ids = [t["tender_id"] for t in tenders]
 
-    total = len(tender_ids)
+    total = len(tenders)
     print(f"Found {total} tenders.\n")
-    print(f"Processing with {MAX_WORKERS} parallel workers...\n")
-
-    results = []
-    completed_count = 0
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_tender = {executor.submit(process_tender, t): t for t in tender_ids}
 
-        for future in as_completed(future_to_tender):
-            tender_id = future_to_tender[future]
-            try:
-                result = future.result()
-            except Exception as exc:
-                result = {"tender_id": tender_id, "error": str(exc)}
+    print("Estimating work from S3 metadata...")
+    listing = asyncio.run(list_s3_pdf_objects_many([f"tender-documents/{t}/" for t in tender_ids]))
+    completed = get_completed_documents(tender_ids)
+    tasks = build_tasks(tenders, listing, completed)
+    for rank, task in enumerate(tasks):
+        task["rank"] = len(tasks) - rank
 
-            results.append(result)
-            completed_count += 1
-            print(f"Progress: {completed_count}/{total} done\n")
+    print(f"Scheduling ~{sum(t['est_pages'] for t in tasks)} pages with {TARGET_PAGES_IN_FLIGHT} pages in flight...\n")
+    results, stats = run_schedule(tasks, submit_tender, poll_finished, TARGET_PAGES_IN_FLIGHT, POLL_SECONDS)
 
     print("\n==================== FINAL SUMMARY ====================")
 
@@ -63,6 +72,8 @@ def main():
     print(f"Total scanned pages: {total_scanned}")
     print(f"Total regular pages: {total_regular}")
     print(f"Errors: {total_errors}")
+    print(f"Makespan: {stats['makespan_seconds']:.0f}s")
+    print(f"Queue wait: mean {stats['mean_queue_wait_seconds']:.0f}s, p95 {stats['p95_queue_wait_seconds']:.0f}s")
 
     print("========================================================")
 
@@ -1,8 +1,13 @@
-import os
-import openai
+from utils.metrics import timed, inc
+from utils.clients import per_process
 from config import BATCH_SIZE, OPENAI_API_KEY, EMBEDDING_MODEL
 
-openai.api_key = OPENAI_API_KEY
+def _new_openai_client():
+    # built on first use, which also keeps the openai import off startup
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+get_openai_client = per_process(_new_openai_client)
 
 def embed_batch(chunks):
     texts = [c["data"] for c in chunks]
@@ -11,10 +16,14 @@ def embed_batch(chunks):
     for i in range(0, len(texts), BATCH_SIZE):
         batch_texts = texts[i:i+BATCH_SIZE]
         # NEW v1+ API
-        response = openai.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=batch_texts
-        )
+        inc("llm_requests_total", provider="openai")
+        with timed("embed"):
+            response = get_openai_client().embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=batch_texts
+            )
+        if response.usage:
+            inc("llm_tokens_total", response.usage.prompt_tokens, provider="openai", direction="prompt")
         batch_vectors = [item.embedding for item in response.data]
         vectors.extend(batch_vectors)
 
@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+import resource
+import threading
+from collections import deque
+from contextlib import contextmanager
+from utils.page_extraction import RENDER_DPI
+from config import MEMORY_BUDGET_MB, MIN_PAGE_BATCH, MAX_PAGE_BATCH, MAX_PROCESSES_GROQ
+
+SAMPLE_SECONDS = 0.05
+DEFAULT_PAGE_COST = 2 * 1024 * 1024
+MIN_PAGE_COST = 256 * 1024
+MB = 1024 * 1024
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # no procfs: fall back to the process peak, which only ever over-estimates
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def rendered_page_bytes(width_pt: float, height_pt: float) -> int:
+    scale = RENDER_DPI / 72
+    return int(width_pt * scale) * int(height_pt * scale) * 3
+
+class MemoryAccountant:
+    # one budget per process shared by every document in flight; a batch reserves its estimated
+    # bytes before it runs and releases them when it is done. Reservations are admitted in arrival
+    # order, so once a large one is queued later ones wait behind it instead of starving it.
+    # Only called from the event loop thread; the RSS sampler threads just read pages_in_flight.
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.reserved_bytes = 0
+        self.pages_in_flight = 0
+        self.waiters = deque()
+
+    def _grant(self, want_bytes, min_bytes, pages_for):
+        # a batch bigger than the whole budget is admitted alone, charged as the whole budget
+        free = self.budget_bytes - self.reserved_bytes
+        if free < min(min_bytes, self.budget_bytes):
+            return None
+        granted = max(min(want_bytes, free), 0)
+        pages = pages_for(granted)
+        self.reserved_bytes += granted
+        self.pages_in_flight += pages
+        return granted, pages
+
+    def _admit(self):
+        while self.waiters:
+            waiter, want_bytes, min_bytes, pages_for = self.waiters[0]
+            if not waiter.done():
+                grant = self._grant(want_bytes, min_bytes, pages_for)
+                if grant is None:
+                    return
+                waiter.set_result(grant)
+            self.waiters.popleft()
+
+    async def reserve(self, want_bytes, min_bytes, pages_for):
+        if not self.waiters:
+            grant = self._grant(want_bytes, min_bytes, pages_for)
+            if grant is not None:
+                return grant
+
+        entry = (asyncio.get_running_loop().create_future(), want_bytes, min_bytes, pages_for)
+        self.waiters.append(entry)
+        try:
+            return await entry[0]
+        except asyncio.CancelledError:
+            waiter = entry[0]
+            if waiter.done() and not waiter.cancelled():
+                self.release(*waiter.result())
+            raise
+        finally:
+            if entry in self.waiters:
+                self.waiters.remove(entry)
+                self._admit()
+
+    def release(self, granted, pages):
+        self.reserved_bytes -= granted
+        self.pages_in_flight -= pages
+        self._admit()
+
+accountant = MemoryAccountant(MEMORY_BUDGET_MB * MB)
+
+class PageBatchController:
+    def __init__(self, total_pages, file_bytes, page_width, page_height, budget=accountant):
+        self.budget = budget
+        # up to MAX_PROCESSES_GROQ scanned pages are rendered at once whatever the batch size,
+        # each holding the full bitmap plus its half-size copy
+        self.render_reserve = MAX_PROCESSES_GROQ * rendered_page_bytes(page_width, page_height) * 5 // 4
+        self.page_cost = max(DEFAULT_PAGE_COST, 4 * file_bytes // max(total_pages, 1))
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self.batch_sizes = []
+        self.wait_seconds = 0.0
+        self._reservation = (0, 0)
+
+    @property
+    def budget_bytes(self):
+        return self.budget.budget_bytes
+
+    async def acquire(self, remaining: int) -> int:
+        page_cost = self.page_cost
+        want_pages = max(MIN_PAGE_BATCH, min(MAX_PAGE_BATCH, remaining))
+
+        def _pages_for(granted):
+            return max(MIN_PAGE_BATCH, min(want_pages, int((granted - self.render_reserve) // page_cost)))
+
+        start = time.monotonic()
+        granted, pages = await self.budget.reserve(
+            self.render_reserve + want_pages * page_cost,
+            self.render_reserve + MIN_PAGE_BATCH * page_cost,
+            _pages_for
+        )
+        self.wait_seconds += time.monotonic() - start
+        self._reservation = (granted, pages)
+        return pages
+
+    @contextmanager
+    def measure(self, pages: int):
+        # sample from a thread: page parsing blocks the event loop, so an asyncio sampler would miss the peak
+        before = current_rss()
+        peak = [before]
+        in_flight = [pages]
+        stop = threading.Event()
+
+        def _sample():
+            while not stop.wait(SAMPLE_SECONDS):
+                peak[0] = max(peak[0], current_rss())
+                in_flight[0] = max(in_flight[0], self.budget.pages_in_flight)
+
+        sampler = threading.Thread(target=_sample, daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            self.budget.release(*self._reservation)
+            self._reservation = (0, 0)
+            batch_peak = max(peak[0], current_rss())
+            self.peak_rss = max(self.peak_rss, batch_peak)
+            # RSS is process-wide: share the growth across every page in flight, not just ours
+            measured = max((batch_peak - before) / max(in_flight[0], 1), MIN_PAGE_COST)
+            self.page_cost = int((self.page_cost + measured) / 2)
+            self.batch_sizes.append(pages)
+
+    def stats(self) -> dict:
+        return {
+            "peak_rss_mb": round(self.peak_rss / MB, 1),
+            "rss_growth_mb": round((self.peak_rss - self.start_rss) / MB, 1),
+            "page_cost_kb": round(self.page_cost / 1024),
+            "batches": len(self.batch_sizes),
+            "max_batch": max(self.batch_sizes, default=0),
+            "budget_wait_seconds": round(self.wait_seconds, 3)
+        }
@@ -1,50 +1,40 @@
-import gc
 import asyncio
-import pdfplumber
-from io import BytesIO
+from utils.metrics import inc
 from request_analysis.chunking import split_text_to_subchunks
 from config import MAX_PROCESSES_DEEPSEEK, MAX_PROCESSES_GROQ
 from request_analysis.regular_helpers import extract_page_content, elements_to_positions
-from request_analysis.scanned_helpers import is_scanned_page, process_scanned_page_worker, deepseek_translate_worker
+from request_analysis.scanned_helpers import process_scanned_page_worker, deepseek_translate_worker
 
 async def groq_worker(job, semaphore):
     async with semaphore:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, process_scanned_page_worker, job)
+        return await asyncio.to_thread(process_scanned_page_worker, job)
         
 async def deepseek_worker(job, semaphore):
     async with semaphore:
-        loop = asyncio.get_running_loop()
-        res = await loop.run_in_executor(None, deepseek_translate_worker, job)
+        res = await asyncio.to_thread(deepseek_translate_worker, job)
         sub_chunks = split_text_to_subchunks(
             res["translated_text"], res["page"], 1, "text", is_scanned=True
         )
-        gc.collect()
         return sub_chunks
 
-async def process_pdf_batch(pdf_bytes, start_page=0, end_page=None):
+async def process_pdf_batch(pages):
     all_sub_chunks = []
     scanned_jobs = []
 
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        total_pages = len(pdf.pages)
-        if end_page is None or end_page > total_pages:
-            end_page = total_pages
+    for record in pages:
+        if record["scanned"]:
+            scanned_jobs.append((record["page"] - 1, record["render"]))
+        else:
+            elements = extract_page_content(record)
+            positions = elements_to_positions(elements)
+            for pos in positions:
+                sub_chunks = split_text_to_subchunks(
+                    pos["content"], record["page"], pos["position"], pos["type"], is_scanned=False
+                )
+                all_sub_chunks.extend(sub_chunks)
 
-        for i in range(start_page, end_page):
-            page = pdf.pages[i]
-            scanned = is_scanned_page(page)
-            if scanned:
-                scanned_jobs.append((i, pdf_bytes))
-            else:
-                elements = extract_page_content(page)
-                positions = elements_to_positions(elements)
-                for pos in positions:
-                    sub_chunks = split_text_to_subchunks(
-                        pos["content"], i+1, pos["position"], pos["type"], is_scanned=False
-                    )
-                    all_sub_chunks.extend(sub_chunks)
-        gc.collect()
+    inc("pages_total", len(scanned_jobs), pipeline="request_analysis", kind="scanned")
+    inc("pages_total", len(pages) - len(scanned_jobs), pipeline="request_analysis", kind="regular")
 
     groq_results = []
     if scanned_jobs:
@@ -60,7 +50,5 @@ async def process_pdf_batch(pdf_bytes, start_page=0, end_page=None):
         deepseek_results = await asyncio.gather(*deepseek_tasks)
         for sub_chunks in deepseek_results:
             all_sub_chunks.extend(sub_chunks)
-        gc.collect()
 
-    gc.collect()
-    return all_sub_chunks, len(scanned_jobs), (end_page - start_page - len(scanned_jobs))
+    return all_sub_chunks, len(scanned_jobs), (len(pages) - len(scanned_jobs))
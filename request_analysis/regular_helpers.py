@@ -1,24 +1,22 @@
-def extract_page_content(page):
+def extract_page_content(record):
     elements, table_bboxes = [], []
 
-    for table in page.find_tables():
-        table_bboxes.append(table.bbox)
-        table_text = "\n".join(" | ".join((cell or "") for cell in row) for row in table.extract())
-        elements.append({"type": "table", "top": float(table.bbox[1]), "content": table_text})
+    for table in record["tables"]:
+        table_bboxes.append(table["bbox"])
+        table_text = "\n".join(" | ".join(row) for row in table["rows"])
+        elements.append({"type": "table", "top": float(table["bbox"][1]), "content": table_text})
 
-    words = page.extract_words()
     grouped_lines = []
 
-    for word in words:
-        x0, x1, top, bottom = float(word["x0"]), float(word["x1"]), float(word["top"]), float(word["bottom"])
+    for x0, top, x1, bottom, text in record["words"]:
         if any(x0 >= bx0 and x1 <= bx1 and top >= by0 and bottom <= by1 for (bx0, by0, bx1, by1) in table_bboxes):
             continue
         for line in grouped_lines:
             if abs(line["top"] - top) <= 2:
-                line["words"].append((x0, word["text"]))
+                line["words"].append((x0, text))
                 break
         else:
-            grouped_lines.append({"top": top, "words": [(x0, word["text"])]})
+            grouped_lines.append({"top": top, "words": [(x0, text)]})
 
     for line in grouped_lines:
         line["words"].sort()
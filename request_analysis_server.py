@@ -1,17 +1,34 @@
 from fastapi.middleware.cors import CORSMiddleware
 import os
-import gc
+import time
 import asyncio
 import requests
-import pdfplumber
-from io import BytesIO
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from utils.s3_utils import list_s3_pdfs, fetch_pdf
-from request_analysis.embedding_utils import embed_batch 
+from fastapi.responses import PlainTextResponse
+from utils.s3_utils import list_s3_pdf_objects, prefetch_pdfs
+from utils.job_utils import make_job_router, start_job_workers, stop_job_workers
+from utils.metrics import timed, observe, observe_stage, begin_tender_timings, snapshot_timings, render_metrics, run_metrics_flusher
+from utils.clients import close_clients
+from request_analysis.embedding_utils import embed_batch
 from request_analysis.pdf_processing import process_pdf_batch
-from utils.mongo_utils import vector_collection, is_document_complete, store_embeddings_in_db, mark_document_complete
+from request_analysis.memory_budget import PageBatchController
+from utils.page_extraction import document_info, extract_document
+from utils.mongo_utils import delete_document_embeddings, is_document_complete, store_embeddings_in_db, mark_document_complete
 
-app = FastAPI()
+JOB_KIND = "request_analysis"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = start_job_workers(JOB_KIND, process_single_tender)
+    flusher = asyncio.create_task(run_metrics_flusher())
+    yield
+    await stop_job_workers(workers)
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+    close_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:8080",
@@ -30,11 +47,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(make_job_router(JOB_KIND))
+
 async def process_single_tender(tender_id: str):
     print(f"\n===============================")
     print(f"▶ START tender: {tender_id}")
     print(f"===============================")
 
+    tender_start = time.perf_counter()
+    timings = begin_tender_timings()
+
     report = {
         "tender_id": tender_id,
         "processed_docs": 0,
@@ -42,38 +64,45 @@ async def process_single_tender(tender_id: str):
         "empty_docs": 0,
         "scanned_pages": 0,
         "regular_pages": 0,
+        "s3_wait_seconds": 0.0,
+        "memory": {},
         "errors": []
     }
 
     s3_prefix = f"tender-documents/{tender_id}/"
     print(f"📂 Fetching S3 PDFs from prefix: {s3_prefix}")
 
-    pdf_keys = await list_s3_pdfs(s3_prefix)
-    print(f"📄 Found {len(pdf_keys)} PDFs")
-
-    for pdf_key in pdf_keys:
-        document_name = os.path.basename(pdf_key)
-        print(f"📄 Document: {document_name}")
-
-        if await asyncio.to_thread(is_document_complete, tender_id, document_name):
-            print(f"⏩ Already processed, skipping")
+    with timed("s3_list"):
+        pdf_objects = await list_s3_pdf_objects(s3_prefix)
+    print(f"📄 Found {len(pdf_objects)} PDFs")
+
+    pending_objects = []
+    for pdf_object in pdf_objects:
+        document_name = os.path.basename(pdf_object["key"])
+        with timed("mongo"):
+            already_complete = await asyncio.to_thread(is_document_complete, tender_id, document_name)
+        if already_complete:
+            print(f"⏩ Already processed, skipping {document_name}")
             report["skipped_docs"] += 1
             continue
+        pending_objects.append(pdf_object)
+
+    async for pdf_object, pdf_path, s3_wait in prefetch_pdfs(pending_objects):
+        document_name = os.path.basename(pdf_object["key"])
+        print(f"📄 Document: {document_name}")
+        report["s3_wait_seconds"] += s3_wait
+        observe_stage("s3_wait", s3_wait)
         
-        await asyncio.to_thread(
-            vector_collection.delete_many,
-            {"tender_id": tender_id, "document_name": document_name}
-        )
+        with timed("mongo"):
+            await asyncio.to_thread(delete_document_embeddings, tender_id, document_name)
         print("🗑 Removed previous embeddings (if any)")
 
         try:
-            print("⬇ Fetching PDF from S3")
-            pdf_stream = await fetch_pdf(pdf_key)
-            pdf_bytes = pdf_stream.read()
+            if isinstance(pdf_path, Exception):
+                raise pdf_path
 
-            total_pages = await asyncio.to_thread(
-                lambda: len(pdfplumber.open(BytesIO(pdf_bytes)).pages)
-            )
+            info = await asyncio.to_thread(document_info, pdf_path)
+            total_pages = info["page_count"]
             print(f"📄 Total pages: {total_pages}")
 
             if total_pages == 0:
@@ -81,22 +110,18 @@ async def process_single_tender(tender_id: str):
                 report["empty_docs"] += 1
                 continue
 
-            file_size_kb = len(pdf_bytes) / 1024
-            size_per_page_kb = file_size_kb / max(total_pages, 1)
-            if size_per_page_kb < 250:
-                batch_size = 20
-            else:
-                batch_size = 5
-            print(f"📦 Dynamic batch size = {batch_size} (size_per_page={size_per_page_kb:.1f} KB)")
+            batcher = PageBatchController(total_pages, os.path.getsize(pdf_path), info["width"], info["height"])
+            print(f"📦 Process memory budget = {batcher.budget_bytes // (1024 * 1024)} MB (render reserve={batcher.render_reserve // (1024 * 1024)} MB)")
 
-            for start in range(0, total_pages, batch_size):
-                end = min(start + batch_size, total_pages)
+            start = 0
+            while start < total_pages:
+                end = start + await batcher.acquire(total_pages - start)
                 is_last = (end >= total_pages)
-                print(f"🔹 Page batch: {start} → {end} (last={is_last})")
+                print(f"🔹 Page batch: {start} → {end} (last={is_last}, page_cost={batcher.page_cost // 1024} KB)")
 
-                chunks, scanned, regular = await process_pdf_batch(
-                    pdf_bytes, start, end
-                )
+                with batcher.measure(end - start):
+                    pages = await asyncio.to_thread(extract_document, pdf_path, start, end)
+                    chunks, scanned, regular = await process_pdf_batch(pages)
 
                 print(f"   • Chunks = {len(chunks)} | Scanned = {scanned} | Regular = {regular}")
 
@@ -110,20 +135,24 @@ async def process_single_tender(tender_id: str):
                             c["document_name"] = document_name
                 
                         embeddings = await asyncio.to_thread(embed_batch, chunks)
-                        await asyncio.to_thread(store_embeddings_in_db, embeddings, document_name, tender_id)
+                        with timed("mongo"):
+                            await asyncio.to_thread(store_embeddings_in_db, embeddings, document_name, tender_id)
                         print(f"[{document_name}] 🔹 Batch embedded & stored ({len(chunks)} chunks)")
                 
                         if is_last:
-                            await asyncio.to_thread(mark_document_complete, tender_id, document_name)
+                            with timed("mongo"):
+                                await asyncio.to_thread(mark_document_complete, tender_id, document_name)
                             print(f"[{document_name}] 🎉 Document marked COMPLETE")
                 
                     except Exception as e:
                         print(f"❌ Error embedding batch: {e}")
                         report["errors"].append(f"{document_name}: {str(e)}")
                 
-                del chunks
-                gc.collect()
+                del chunks, pages
+                start = end
 
+            report["memory"][document_name] = batcher.stats()
+            print(f"🧠 Memory: {report['memory'][document_name]}")
             print(f"✔ Completed queuing document: {document_name}")
             report["processed_docs"] += 1
 
@@ -131,9 +160,18 @@ async def process_single_tender(tender_id: str):
             print(f"❌ Error processing {document_name}: {e}")
             report["errors"].append(f"{document_name}: {str(e)}")
 
+    report["s3_wait_seconds"] = round(report["s3_wait_seconds"], 3)
+    tender_seconds = time.perf_counter() - tender_start
+    observe("processing_seconds", tender_seconds, pipeline="request_analysis")
+    report["timings"] = snapshot_timings(timings)
+    report["timings"]["total"] = round(tender_seconds, 3)
     print(f"\n🎯 Tender {tender_id} COMPLETED\n")
     return report
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def route_metrics():
+    return render_metrics()
+
 @app.post("/process/{tender_id}")
 async def route_process(tender_id: str):
     print(f"\n🌐 API CALL → /process/{tender_id}")
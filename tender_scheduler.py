@@ -0,0 +1,103 @@
+import math
+import time
+from datetime import datetime, timezone
+from config import EST_BYTES_PER_PAGE, DEADLINE_HORIZON_DAYS, TENDER_PAGE_WINDOW
+
+MAX_HEAD_BYPASSES = 8
+
+def estimate_pages(pdf_objects, completed_documents):
+    remaining_bytes = 0
+    for obj in pdf_objects:
+        document_name = obj["key"].rsplit("/", 1)[-1]
+        if document_name not in completed_documents:
+            remaining_bytes += obj["size"]
+    return max(1, math.ceil(remaining_bytes / EST_BYTES_PER_PAGE)) if remaining_bytes else 0
+
+def tender_priority(tender, now):
+    # weighted shortest job first: value and deadline urgency raise the weight, pages are the cost
+    weight = math.log10(max(tender.get("tender_value") or 0, 10))
+
+    deadline = tender.get("deadline")
+    if isinstance(deadline, datetime):
+        if deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=timezone.utc)
+        days_left = max((deadline - now).total_seconds() / 86400, 0)
+        weight *= 1 + max(DEADLINE_HORIZON_DAYS - days_left, 0) / DEADLINE_HORIZON_DAYS
+
+    return weight / max(tender["est_pages"], 1)
+
+def build_tasks(tenders, listing, completed, now=None):
+    now = now or datetime.now(timezone.utc)
+    tasks = []
+    for tender in tenders:
+        tender_id = tender["tender_id"]
+        pdf_objects = listing.get(f"tender-documents/{tender_id}/", [])
+        task = dict(tender)
+        task["est_pages"] = estimate_pages(pdf_objects, completed.get(tender_id, set()))
+        task["priority"] = tender_priority(task, now)
+        tasks.append(task)
+
+    tasks.sort(key=lambda t: t["priority"], reverse=True)
+    return tasks
+
+def _in_flight_cost(task):
+    # a tender works through its documents one at a time, so it never has more than a
+    # window of pages at the LLMs however large it is
+    return min(task["est_pages"], TENDER_PAGE_WINDOW)
+
+def _next_fitting(queue, in_flight_pages, target_pages, nothing_in_flight, head_bypasses):
+    for i, task in enumerate(queue):
+        if nothing_in_flight or in_flight_pages + _in_flight_cost(task) <= target_pages:
+            return i
+        # stop packing around a large head task once it has been overtaken often enough
+        if head_bypasses >= MAX_HEAD_BYPASSES:
+            return None
+    return None
+
+def run_schedule(tasks, submit, poll, target_pages, poll_seconds=10, clock=time.monotonic, sleep=time.sleep):
+    # submit(task) -> job_id, poll(job_ids) -> finished jobs ({"job_id", "report"}).
+    # A tender whose submit fails is recorded as an error result and the run carries on.
+    # When the next task does not fit the page budget, smaller lower-priority tasks are packed in.
+    start = clock()
+    queue = list(tasks)
+    in_flight = {}
+    in_flight_pages = 0
+    waits = []
+    results = []
+    finished_at = start
+    head_bypasses = 0
+
+    while queue or in_flight:
+        while queue:
+            i = _next_fitting(queue, in_flight_pages, target_pages, not in_flight, head_bypasses)
+            if i is None:
+                break
+            head_bypasses = head_bypasses + 1 if i > 0 else 0
+            task = queue.pop(i)
+            try:
+                job_id = submit(task)
+            except Exception as e:
+                print(f"❌ Tender {task['tender_id']} could not be submitted: {e}")
+                results.append({"tender_id": task["tender_id"], "error": str(e)})
+                continue
+            in_flight[job_id] = task
+            in_flight_pages += _in_flight_cost(task)
+            waits.append(clock() - start)
+            print(f"▶ Dispatched tender {task['tender_id']} (~{task['est_pages']} pages, {in_flight_pages} pages in flight)")
+
+        if not in_flight:
+            continue
+        sleep(poll_seconds)
+        for job in poll(list(in_flight)):
+            task = in_flight.pop(job["job_id"])
+            in_flight_pages -= _in_flight_cost(task)
+            finished_at = clock()
+            results.append(job["report"])
+
+    waits.sort()
+    stats = {
+        "makespan_seconds": finished_at - start,
+        "mean_queue_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+        "p95_queue_wait_seconds": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+    }
+    return results, stats
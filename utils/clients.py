@@ -0,0 +1,53 @@
+import os
+import threading
+
+# Clients are created lazily per worker process: Mongo, boto3 and HTTP sessions are not
+# fork-safe, and building them on first use keeps their imports off startup. Every client
+# is registered here so app lifespans close all of them with close_clients().
+
+_registry = []
+
+class PerProcess:
+    def __init__(self, factory, close):
+        self.factory = factory
+        self.close_fn = close
+        self.value = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        if self.value is None or self.pid != os.getpid():
+            with self.lock:
+                if self.value is None or self.pid != os.getpid():
+                    self.value = self.factory()
+                    self.pid = os.getpid()
+        return self.value
+
+    def set(self, value):
+        # install a ready-made client (benchmarks swap in mocks this way)
+        with self.lock:
+            self.value = value
+            self.pid = os.getpid()
+
+    def close(self):
+        with self.lock:
+            value, pid = self.value, self.pid
+            self.value = None
+        # a client inherited through fork belongs to the parent, drop it without closing
+        if value is not None and pid == os.getpid():
+            self.close_fn(value)
+
+def _close(client):
+    client.close()
+
+def per_process(factory, close=_close):
+    client = PerProcess(factory, close)
+    _registry.append(client)
+    return client
+
+def close_clients():
+    for client in reversed(_registry):
+        try:
+            client.close()
+        except Exception as e:
+            print(f"⚠️ Error closing client: {e}")
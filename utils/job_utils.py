@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import socket
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from config import JOB_WORKERS, JOB_LEASE_SECONDS, JOB_POLL_SECONDS
+from utils.mongo_utils import (
+    ensure_job_indexes, enqueue_job, claim_job, renew_job_lease,
+    complete_job, fail_job, get_job, get_jobs
+)
+
+TERMINAL_STATUSES = ("done", "failed")
+
+def serialize_job(job):
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "tender_id": job["tender_id"],
+        "status": job["status"],
+        "priority": job.get("priority", 0),
+        "attempts": job.get("attempts", 0),
+        "created_at": job["created_at"].isoformat() if isinstance(job.get("created_at"), datetime) else None,
+        "updated_at": job["updated_at"].isoformat() if isinstance(job.get("updated_at"), datetime) else None,
+        "report": job.get("report"),
+        "error": job.get("error")
+    }
+
+async def _heartbeat(job, processing, lease_lost):
+    last_renewed = time.monotonic()
+    delay = JOB_LEASE_SECONDS / 3
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            renewed = await asyncio.to_thread(renew_job_lease, job["_id"], job["lease_token"], JOB_LEASE_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Lease renewal error for job {job['_id']}: {e}")
+            renewed = None
+
+        if renewed:
+            last_renewed = time.monotonic()
+            delay = JOB_LEASE_SECONDS / 3
+            continue
+        if renewed is None and time.monotonic() - last_renewed < JOB_LEASE_SECONDS:
+            # transient error: retry sooner while the lease is still ours
+            delay = JOB_POLL_SECONDS
+            continue
+
+        # another worker may already own the tender, stop before both write its results
+        print(f"⚠️ Lost lease on job {job['_id']} (tender {job['tender_id']}), cancelling it")
+        lease_lost.set()
+        processing.cancel()
+        return
+
+async def run_job_worker(kind, process_fn, worker_id):
+    print(f"👷 Job worker {worker_id} started for {kind}")
+    while True:
+        try:
+            job = await asyncio.to_thread(claim_job, kind, worker_id, JOB_LEASE_SECONDS)
+        except Exception as e:
+            print(f"❌ Job claim error: {e}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            continue
+
+        print(f"▶ Worker {worker_id} claimed job {job['_id']} (tender {job['tender_id']}, attempt {job['attempts']})")
+        lease_lost = asyncio.Event()
+        processing = asyncio.create_task(process_fn(job["tender_id"]))
+        heartbeat = asyncio.create_task(_heartbeat(job, processing, lease_lost))
+        error = None
+        try:
+            report = await processing
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                # shutting down: the lease expires and another worker picks the job up
+                raise
+            continue
+        except Exception as e:
+            error = e
+        finally:
+            heartbeat.cancel()
+
+        try:
+            if error is None:
+                await asyncio.to_thread(complete_job, job["_id"], job["lease_token"], report)
+                print(f"✔ Job {job['_id']} done")
+            else:
+                print(f"❌ Job {job['_id']} failed: {error}")
+                await asyncio.to_thread(fail_job, job["_id"], job["lease_token"], str(error), job["attempts"])
+        except Exception as e:
+            # the lease runs out and the job is claimed again, the worker itself must survive
+            print(f"❌ Could not record result of job {job['_id']}: {e}")
+
+def start_job_workers(kind, process_fn):
+    ensure_job_indexes()
+    # resolved here rather than at import so every forked server worker gets its own ids
+    worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+    return [
+        asyncio.create_task(run_job_worker(kind, process_fn, f"{worker_prefix}:{i}"))
+        for i in range(JOB_WORKERS)
+    ]
+
+async def stop_job_workers(workers):
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+def make_job_router(kind):
+    router = APIRouter()
+
+    @router.post("/jobs")
+    async def route_enqueue_jobs(payload: dict):
+        tender_ids = payload.get("tender_ids") or []
+        priority = payload.get("priority", 0)
+        if not tender_ids:
+            raise HTTPException(status_code=400, detail="tender_ids is required")
+
+        jobs = []
+        for tender_id in tender_ids:
+            job = await asyncio.to_thread(enqueue_job, kind, tender_id, priority)
+            jobs.append(serialize_job(job))
+        print(f"📥 Enqueued {len(jobs)} {kind} jobs")
+        return {"jobs": jobs}
+
+    @router.get("/jobs")
+    async def route_get_jobs(ids: str):
+        jobs = await asyncio.to_thread(get_jobs, ids.split(","))
+        return {"jobs": [serialize_job(job) for job in jobs]}
+
+    @router.get("/jobs/{job_id}")
+    async def route_get_job(job_id: str):
+        job = await asyncio.to_thread(get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return serialize_job(job)
+
+    @router.get("/jobs/{job_id}/events")
+    async def route_job_events(job_id: str):
+        job = await asyncio.to_thread(get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        async def _events():
+            last_seen = None
+            while True:
+                current = await asyncio.to_thread(get_job, job_id)
+                if current is None:
+                    # the job document was removed while the client was watching it
+                    return
+                data = serialize_job(current)
+                marker = (data["status"], data["updated_at"])
+                if marker != last_seen:
+                    last_seen = marker
+                    yield f"data: {json.dumps(data)}\n\n"
+                if data["status"] in TERMINAL_STATUSES:
+                    return
+                await asyncio.sleep(JOB_POLL_SECONDS)
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    return router
@@ -1,30 +1,240 @@
+import os
 import re
 import time
 import base64
+import random
+import threading
 import requests
-from groq import Groq
-from io import BytesIO
-from config import GROQ_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_API_KEY
+from collections import deque
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.metrics import timed, inc
+from utils.clients import per_process
+from config import (
+    LLM_VISION_BACKENDS, LLM_TEXT_BACKENDS, LLM_MAX_INFLIGHT, LLM_MAX_ATTEMPTS, LLM_MIN_TIMEOUT, LLM_MAX_TIMEOUT,
+    LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_HEDGE_BUDGET, LLM_HEDGE_DEFAULT_DELAY, LLM_HEDGE_MIN_DELAY,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN
+)
 
-groq_client = Groq(api_key=GROQ_API_KEY)
+# Every chat call goes through a BackendPool: the first healthy backend gets the request, a
+# hedged duplicate goes to the next one once the primary runs past its own p95, and the first
+# answer wins. Failing backends trip a circuit breaker and later calls fail over to the rest.
+
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+HEDGE_BURST = 5
+CONNECT_TIMEOUT = 5.0
+
+class LLMError(RuntimeError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _retry_after(response):
+    try:
+        return min(float(response.headers.get("Retry-After", "")), LLM_BACKOFF_MAX)
+    except ValueError:
+        return None
+
+class Backend:
+    def __init__(self, name, url, model, api_key=None, api_key_env=None):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key or os.getenv(api_key_env or "")
+        self.session = requests.Session()
+        self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=LLM_MAX_INFLIGHT))
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def percentile(self, pct):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))]
+
+    def timeout(self):
+        p99 = self.percentile(99)
+        if p99 is None:
+            return LLM_MAX_TIMEOUT
+        return min(LLM_MAX_TIMEOUT, max(LLM_MIN_TIMEOUT, 3 * p99))
+
+    def acquire(self) -> bool:
+        with self.lock:
+            if self.failures < LLM_BREAKER_FAILURES:
+                return True
+            if time.monotonic() < self.open_until or self.trial_in_flight:
+                return False
+            # half-open: let a single trial request through
+            self.trial_in_flight = True
+            return True
+
+    def _record(self, ok, seconds=None):
+        with self.lock:
+            self.trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.latencies.append(seconds)
+                return
+            self.failures += 1
+            if self.failures < LLM_BREAKER_FAILURES:
+                return
+            # already open: late failures of requests sent before it opened are not a new transition
+            if self.failures > LLM_BREAKER_FAILURES and time.monotonic() < self.open_until:
+                return
+            self.open_until = time.monotonic() + LLM_BREAKER_COOLDOWN
+        inc("llm_breaker_open_total", provider=self.name)
+        print(f"🔌 Circuit open for {self.name} ({LLM_BREAKER_COOLDOWN:.0f}s)")
+
+    def call(self, payload) -> str:
+        inc("llm_requests_total", provider=self.name)
+        start = time.monotonic()
+        try:
+            response = self.session.post(
+                self.url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                json={**payload, "model": self.model},
+                timeout=(CONNECT_TIMEOUT, self.timeout())
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                raise LLMError(f"{self.name} HTTP {response.status_code}", retry_after=_retry_after(response))
+            data = response.json()
+            if "error" in data:
+                raise LLMError(f"{self.name}: {data['error'].get('message')}")
+            if "choices" not in data:
+                raise LLMError(f"{self.name}: unexpected response {data}")
+            content = data["choices"][0]["message"]["content"] or ""
+        except Exception:
+            inc("llm_errors_total", provider=self.name)
+            self._record(False)
+            raise
+
+        self._record(True, time.monotonic() - start)
+        usage = data.get("usage") or {}
+        inc("llm_tokens_total", usage.get("prompt_tokens", 0), provider=self.name, direction="prompt")
+        inc("llm_tokens_total", usage.get("completion_tokens", 0), provider=self.name, direction="completion")
+        return content
+
+class BackendPool:
+    def __init__(self, stage, backends, hedge_budget=LLM_HEDGE_BUDGET):
+        self.stage = stage
+        self.backends = [backend if isinstance(backend, Backend) else Backend(**backend) for backend in backends]
+        self.hedge_budget = hedge_budget
+        self.calls = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=LLM_MAX_INFLIGHT, thread_name_prefix=f"llm-{stage}")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.session.close()
+
+    def _pick(self, exclude=()):
+        for backend in self.backends:
+            if backend not in exclude and backend.acquire():
+                return backend
+        return None
+
+    def _take_hedge(self) -> bool:
+        # hedges may add at most hedge_budget extra requests per call, plus a small burst
+        with self.lock:
+            if self.hedges >= self.hedge_budget * self.calls + HEDGE_BURST:
+                return False
+            self.hedges += 1
+            return True
+
+    def _hedge_delay(self, backend):
+        p95 = backend.percentile(95)
+        return max(LLM_HEDGE_MIN_DELAY, LLM_HEDGE_DEFAULT_DELAY if p95 is None else p95)
+
+    def _attempt(self, payload, primary):
+        pending = {self.executor.submit(primary.call, payload): primary}
+        done, _ = wait(pending, timeout=self._hedge_delay(primary))
+        if not done and self.hedge_budget > 0 and self._take_hedge():
+            hedge = self._pick(exclude=(primary,)) or primary
+            inc("llm_hedges_total", provider=hedge.name)
+            pending[self.executor.submit(hedge.call, payload)] = hedge
+
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if backend is not primary:
+                    inc("llm_hedge_wins_total", provider=backend.name)
+                # losers keep running in the executor and still feed the latency window
+                return result
+        raise error
+
+    def complete(self, payload) -> str:
+        with self.lock:
+            self.calls += 1
+
+        with timed(self.stage):
+            failed = set()
+            error = None
+            for attempt in range(LLM_MAX_ATTEMPTS):
+                if attempt:
+                    inc("llm_retries_total", provider=self.stage)
+                    backoff = getattr(error, "retry_after", None)
+                    time.sleep(backoff if backoff is not None else random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt)))
+
+                primary = self._pick(exclude=failed) or self._pick()
+                if primary is None:
+                    error = LLMError(f"All {self.stage} backends have open circuits")
+                    continue
+                if primary is not self.backends[0]:
+                    inc("llm_failovers_total", provider=primary.name)
+
+                try:
+                    return self._attempt(payload, primary)
+                except Exception as e:
+                    error = e
+                    failed.add(primary)
+                    print(f"⚠ {self.stage} attempt {attempt + 1}/{LLM_MAX_ATTEMPTS} failed: {e}")
+            raise error
+
+def _new_pools():
+    return {
+        "vision": BackendPool("groq", LLM_VISION_BACKENDS),
+        "text": BackendPool("deepseek", LLM_TEXT_BACKENDS)
+    }
+
+def _close_pools(pools):
+    for pool in pools.values():
+        pool.close()
+
+# pools hold sessions and threads, so each worker process builds its own on first use
+_pools = per_process(_new_pools, close=_close_pools)
+
+def get_pool(kind):
+    return _pools()[kind]
 
 def query_groq(pil_image_bytes: bytes, prompt: str) -> str:
     img_base64 = base64.b64encode(pil_image_bytes).decode("utf-8")
     image_data_url = f"data:image/jpeg;base64,{img_base64}"
 
-    response = groq_client.chat.completions.create(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        messages=[{
+    return get_pool("vision").complete({
+        "messages": [{
             "role": "user",
             "content": [
                 {"type": "text", "text": prompt},
                 {"type": "image_url", "image_url": {"url": image_data_url}}
             ]
         }],
-        temperature=0.3,
-        max_completion_tokens=4096
-    )
-    return response.choices[0].message.content.strip()
+        "temperature": 0.3,
+        "max_completion_tokens": 4096
+    }).strip()
 
 def clean_llm_output(text: str) -> str:
     text = re.sub(r"```(?:markdown)?\s*", "", text)
@@ -32,36 +242,12 @@ def clean_llm_output(text: str) -> str:
     text = re.sub(r"\$\$(.*?)\$\$", "", text, flags=re.DOTALL)
     text = re.sub(r"\$(.*?)\$", "", text, flags=re.DOTALL)
     return text.strip()
-    
-def query_deepseek(prompt, retries=3, delay=2):
-    headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-    payload = {
-        "model": "deepseek-chat",
+
+def query_deepseek(prompt):
+    return clean_llm_output(get_pool("text").complete({
         "messages": [
             {"role": "system", "content": "You are a tender consultant."},
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.0
-    }
-
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.post(DEEPSEEK_API_URL, headers=headers, json=payload, timeout=30)
-            data = response.json()
-
-            if "choices" in data:
-                cleaned = clean_llm_output(data["choices"][0]["message"]["content"])
-                return cleaned
-
-            elif "error" in data:
-                raise RuntimeError(data["error"]["message"])
-
-            else:
-                raise RuntimeError(f"Unexpected response: {data}")
-
-        except Exception as e:
-            print(f"DeepSeek error: {e}")
-            if attempt < retries:
-                time.sleep(delay * attempt)
-            else:
-                raise
+    }))
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from config import METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS
+
+# In-process counters and histograms rendered in the Prometheus text format.
+# Every observation is a dict update under one lock, cheap enough to leave on everywhere.
+# With several worker processes set METRICS_MULTIPROC_DIR to a directory cleared on deploy:
+# each worker flushes its values there and /metrics on any worker reports the sum.
+
+METRIC_PREFIX = "tender_"
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# whole tenders run from seconds to hours
+TENDER_BUCKETS = (10, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400)
+HISTOGRAM_BUCKETS = {"processing_seconds": TENDER_BUCKETS}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_tender_timings = contextvars.ContextVar("tender_timings", default=None)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def _buckets(name):
+    return HISTOGRAM_BUCKETS.get(name, STAGE_BUCKETS)
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    bounds = _buckets(name)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * len(bounds), 0.0, 0]
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                hist[0][i] += 1
+                break
+        hist[1] += value
+        hist[2] += 1
+
+def observe_stage(stage, seconds):
+    observe("stage_seconds", seconds, stage=stage)
+    timings = _tender_timings.get()
+    if timings is not None:
+        with _lock:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def begin_tender_timings():
+    # tasks and asyncio.to_thread calls started afterwards share this dict through the context
+    timings = {}
+    _tender_timings.set(timings)
+    return timings
+
+def snapshot_timings(timings):
+    with _lock:
+        return {stage: round(seconds, 3) for stage, seconds in sorted(timings.items())}
+
+def _snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(h[0]), h[1], h[2]) for key, h in _histograms.items()}
+    return counters, histograms
+
+def flush_metrics():
+    if not METRICS_MULTIPROC_DIR:
+        return
+    counters, histograms = _snapshot()
+    data = {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [[name, labels, *hist] for (name, labels), hist in histograms.items()]
+    }
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+    path = os.path.join(METRICS_MULTIPROC_DIR, f"{os.getpid()}.json")
+    with open(path + ".part", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".part", path)
+
+async def run_metrics_flusher():
+    try:
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_SECONDS)
+            await asyncio.to_thread(flush_metrics)
+    finally:
+        flush_metrics()
+
+def _merged_snapshot():
+    counters, histograms = _snapshot()
+    if not METRICS_MULTIPROC_DIR or not os.path.isdir(METRICS_MULTIPROC_DIR):
+        return counters, histograms
+
+    own_file = f"{os.getpid()}.json"
+    for entry in os.scandir(METRICS_MULTIPROC_DIR):
+        if entry.name == own_file or not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in data["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            own = histograms.get(key, ([0] * len(_buckets(name)), 0.0, 0))
+            histograms[key] = ([a + b for a, b in zip(own[0], buckets)], own[1] + total, own[2] + count)
+    return counters, histograms
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def render_metrics():
+    counters, histograms = _merged_snapshot()
+
+    lines = []
+    seen_types = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = METRIC_PREFIX + name
+        if metric not in seen_types:
+            lines.append(f"# TYPE {metric} counter")
+            seen_types.add(metric)
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+        metric = METRIC_PREFIX + name
+        if metric not in seen_types:
+            lines.append(f"# TYPE {metric} histogram")
+            seen_types.add(metric)
+        cumulative = 0
+        for bound, bucket_count in zip(_buckets(name), buckets):
+            cumulative += bucket_count
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
@@ -1,23 +1,42 @@
+import uuid
 from bson.objectid import ObjectId
-from pymongo import MongoClient, ReturnDocument
-from config import MONGO_URI, DB_NAME, VECTOR_COLLECTION, TENDERS_COLLECTION, DOCS_STATUS_COLLECTION
+from datetime import datetime, timedelta, timezone
+from pymongo import MongoClient, ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from utils.clients import per_process
+from config import MONGO_URI, DB_NAME, VECTOR_COLLECTION, TENDERS_COLLECTION, DOCS_STATUS_COLLECTION, JOBS_COLLECTION, JOB_MAX_ATTEMPTS, TENDER_DEADLINE_FIELD
 
-mongo = MongoClient(MONGO_URI)
-db = mongo[DB_NAME]
-
-vector_collection = db[VECTOR_COLLECTION]
-tenders_collection = db[TENDERS_COLLECTION]
-docs_status_collection = db[DOCS_STATUS_COLLECTION]
 ALLOWED_INDUSTRIES = ["Water & Sanitation", "Power & Energy"]
 
+# MongoClient is not fork-safe: every worker process creates its own on first use
+get_client = per_process(lambda: MongoClient(MONGO_URI))
+
+def _collection(name):
+    return get_client()[DB_NAME][name]
+
+def vector_collection():
+    return _collection(VECTOR_COLLECTION)
+
+def tenders_collection():
+    return _collection(TENDERS_COLLECTION)
+
+def docs_status_collection():
+    return _collection(DOCS_STATUS_COLLECTION)
+
+def jobs_collection():
+    return _collection(JOBS_COLLECTION)
+
 def store_embeddings_in_db(embeddings, document_name, tender_id):
     try:
-        vector_collection.insert_many(embeddings)
+        vector_collection().insert_many(embeddings)
     except Exception as e:
         print(f"❌ Mongo Insert Error: {e}")
 
+def delete_document_embeddings(tender_id, document_name):
+    vector_collection().delete_many({"tender_id": tender_id, "document_name": document_name})
+
 def get_tender_ids(min_value):
-    cursor = tenders_collection.find(
+    cursor = tenders_collection().find(
         {
             "tender_value": {"$gte": min_value},
             "industries": {"$in": ALLOWED_INDUSTRIES}  
@@ -26,21 +45,41 @@ def get_tender_ids(min_value):
     )
     return [str(doc["_id"]) for doc in cursor]
 
+def get_tenders(min_value):
+    cursor = tenders_collection().find(
+        {
+            "tender_value": {"$gte": min_value},
+            "industries": {"$in": ALLOWED_INDUSTRIES}
+        },
+        {"_id": 1, "tender_value": 1, TENDER_DEADLINE_FIELD: 1}
+    )
+    return [
+        {"tender_id": str(doc["_id"]), "tender_value": doc.get("tender_value"), "deadline": doc.get(TENDER_DEADLINE_FIELD)}
+        for doc in cursor
+    ]
+
+def get_completed_documents(tender_ids, field="completed_documents"):
+    cursor = docs_status_collection().find(
+        {"tender_id": {"$in": tender_ids}},
+        {"_id": 0, "tender_id": 1, field: 1}
+    )
+    return {doc["tender_id"]: set(doc.get(field, [])) for doc in cursor}
+
 def is_document_complete(tender_id, document_name):
-    record = docs_status_collection.find_one(
+    record = docs_status_collection().find_one(
         {"tender_id": tender_id, "completed_documents": document_name}
     )
     return record is not None
 
 def mark_document_complete(tender_id, document_name):
-    docs_status_collection.update_one(
+    docs_status_collection().update_one(
         {"tender_id": tender_id},
         {"$addToSet": {"completed_documents": document_name}},
         upsert=True
     )
 
 def is_form_complete(tender_id, document_name):
-    record = docs_status_collection.find_one(
+    record = docs_status_collection().find_one(
         {"tender_id": tender_id, "completed_forms": document_name}
     )
     return record is not None
@@ -52,14 +91,14 @@ def mark_form_complete(tender_id, document_name, form_pages: list):
     if form_pages:  
         update_data["$set"] = {f"forms.{document_name}": form_pages}
 
-    docs_status_collection.update_one(
+    docs_status_collection().update_one(
         {"tender_id": tender_id},
         update_data,
         upsert=True
     )
 
 def get_forms(tender_id):
-    doc = docs_status_collection.find_one(
+    doc = docs_status_collection().find_one(
         {"tender_id": tender_id},
         {"_id": 0, "forms": 1, "completed_forms": 1}
     )
@@ -74,3 +113,102 @@ def get_forms(tender_id):
         "forms": doc.get("forms", {}),
         "completed_forms": doc.get("completed_forms", [])
     }
+
+def ensure_job_indexes():
+    # "active" marks queued and running jobs; jobs created before the flag existed get it here
+    jobs_collection().update_many(
+        {"status": {"$in": ["queued", "running"]}, "active": {"$exists": False}},
+        {"$set": {"active": True}}
+    )
+    jobs_collection().create_index([("kind", ASCENDING), ("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)])
+    jobs_collection().create_index(
+        [("kind", ASCENDING), ("tender_id", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"active": True},
+        name="one_active_job_per_tender"
+    )
+
+def enqueue_job(kind, tender_id, priority=0):
+    now = datetime.now(timezone.utc)
+    active_filter = {"kind": kind, "tender_id": tender_id, "active": True}
+    # reuse the active job for this tender instead of queueing a duplicate
+    try:
+        return jobs_collection().find_one_and_update(
+            active_filter,
+            {"$setOnInsert": {
+                "status": "queued",
+                "priority": priority,
+                "attempts": 0,
+                "created_at": now,
+                "updated_at": now,
+                "report": None,
+                "error": None
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # a concurrent enqueue from another process inserted it first
+        return jobs_collection().find_one(active_filter)
+
+def claim_job(kind, worker_id, lease_seconds):
+    now = datetime.now(timezone.utc)
+
+    jobs_collection().update_many(
+        {"kind": kind, "status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "active": False, "error": "Lease expired too many times", "updated_at": now}}
+    )
+
+    return jobs_collection().find_one_and_update(
+        {
+            "kind": kind,
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": worker_id,
+                "lease_token": uuid.uuid4().hex,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("priority", DESCENDING), ("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def renew_job_lease(job_id, lease_token, lease_seconds):
+    now = datetime.now(timezone.utc)
+    result = jobs_collection().update_one(
+        {"_id": job_id, "status": "running", "lease_token": lease_token},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}}
+    )
+    return result.modified_count == 1
+
+def complete_job(job_id, lease_token, report):
+    result = jobs_collection().update_one(
+        {"_id": job_id, "status": "running", "lease_token": lease_token},
+        {"$set": {"status": "done", "active": False, "report": report, "updated_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count == 1
+
+def fail_job(job_id, lease_token, error, attempts):
+    status = "queued" if attempts < JOB_MAX_ATTEMPTS else "failed"
+    result = jobs_collection().update_one(
+        {"_id": job_id, "status": "running", "lease_token": lease_token},
+        {"$set": {"status": status, "active": status == "queued", "error": error, "updated_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count == 1
+
+def get_job(job_id):
+    if not ObjectId.is_valid(job_id):
+        return None
+    return jobs_collection().find_one({"_id": ObjectId(job_id)})
+
+def get_jobs(job_ids):
+    object_ids = [ObjectId(job_id) for job_id in job_ids if ObjectId.is_valid(job_id)]
+    return list(jobs_collection().find({"_id": {"$in": object_ids}}))
@@ -0,0 +1,188 @@
+import io
+import os
+import gzip
+import json
+import zlib
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from utils.metrics import timed, inc
+from utils.pdf_cache import pdf_view, pages_cache_path, touch
+
+# One PyMuPDF pass per page shared by extract_forms and request_analysis. Each page becomes
+#   {"page", "width", "height", "text", "words", "tables", "scanned", "content_hash", "render"}
+# with words as [x0, top, x1, bottom, text] and tables as {"bbox", "rows"}. Records are stored
+# one per line in a gzip JSONL file next to the downloaded PDFs, keyed by the document's content
+# hash: a header member with the page count and the offset of every CACHE_BLOCK_PAGES block,
+# then one gzip member per block. Callers read back page ranges by seeking to their block, so a
+# document is never held in memory whole nor inflated from the start for every batch.
+
+RENDER_DPI = 200
+SCANNED_MIN_CHARS = 10
+HASH_MEMO_SIZE = 256
+CACHE_BLOCK_PAGES = 50
+
+_hash_memo = OrderedDict()
+_hash_lock = threading.Lock()
+
+def is_scanned_text(text: str) -> bool:
+    return len(text.strip()) < SCANNED_MIN_CHARS
+
+def document_hash(pdf_path: str) -> str:
+    # memoised per file: request_analysis asks once per page batch. Cached downloads are never
+    # rewritten in place (a new version is a new inode), and their mtime moves with LRU touches
+    stat = os.stat(pdf_path)
+    memo_key = (pdf_path, stat.st_size, stat.st_ino)
+    with _hash_lock:
+        digest = _hash_memo.get(memo_key)
+        if digest is not None:
+            _hash_memo.move_to_end(memo_key)
+            return digest
+
+    with pdf_view(pdf_path) as view:
+        digest = hashlib.sha256(view).hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return digest
+
+def _page_hash(doc, page) -> str:
+    # content stream plus the raw image streams, so scanned pages with identical layout still differ
+    digest = hashlib.blake2b(page.read_contents(), digest_size=16)
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+def _extract_tables(page):
+    # the table finder only looks at ruling lines, pages without vector drawings cannot have any
+    if not page.get_cdrawings():
+        return []
+    tables = []
+    for table in page.find_tables().tables:
+        rows = [[cell or "" for cell in row] for row in table.extract()]
+        tables.append({"bbox": [float(v) for v in table.bbox], "rows": rows})
+    return tables
+
+def _extract_page(doc, page):
+    textpage = page.get_textpage()
+    text = page.get_text("text", textpage=textpage)
+    scanned = is_scanned_text(text)
+    words = [] if scanned else [
+        [round(w[0], 2), round(w[1], 2), round(w[2], 2), round(w[3], 2), w[4]]
+        for w in page.get_text("words", textpage=textpage)
+    ]
+    return {
+        "page": page.number + 1,
+        "width": page.rect.width,
+        "height": page.rect.height,
+        "text": text,
+        "words": words,
+        "tables": [] if scanned else _extract_tables(page),
+        "scanned": scanned,
+        "content_hash": _page_hash(doc, page)
+    }
+
+def _build_cache(pdf_path: str, cache_file: str):
+    import fitz
+    cache_dir = os.path.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.part"
+    with timed("parse"), pdf_view(pdf_path) as view:
+        doc = fitz.open(stream=view, filetype="pdf")
+        try:
+            page_count = len(doc)
+            first = doc[0].rect if page_count else None
+            offsets = []
+            with tempfile.TemporaryFile(dir=cache_dir) as spool:
+                for block_start in range(0, page_count, CACHE_BLOCK_PAGES):
+                    offsets.append(spool.tell())
+                    with gzip.GzipFile(fileobj=spool, mode="wb", compresslevel=3) as member:
+                        for index in range(block_start, min(block_start + CACHE_BLOCK_PAGES, page_count)):
+                            line = json.dumps(_extract_page(doc, doc[index]), separators=(",", ":")) + "\n"
+                            member.write(line.encode("utf-8"))
+                header = {
+                    "page_count": page_count,
+                    "width": first.width if first else 0,
+                    "height": first.height if first else 0,
+                    "block_pages": CACHE_BLOCK_PAGES,
+                    "offsets": offsets
+                }
+                spool.seek(0)
+                with open(tmp, "wb") as f:
+                    f.write(gzip.compress((json.dumps(header) + "\n").encode("utf-8"), compresslevel=3))
+                    shutil.copyfileobj(spool, f)
+        finally:
+            doc.close()
+    os.replace(tmp, cache_file)
+
+def _read_header(f):
+    # the header is the first gzip member; page blocks start right after it
+    inflater = zlib.decompressobj(wbits=31)
+    data = b""
+    while not inflater.eof:
+        chunk = f.read(64 * 1024)
+        if not chunk:
+            raise EOFError(f"Truncated page cache header in {f.name}")
+        data += inflater.decompress(chunk)
+    return json.loads(data), f.tell() - len(inflater.unused_data)
+
+def _cache_file(pdf_path: str) -> str:
+    # renders reopen the PDF by path for every batch, so it must outlive the whole document
+    touch(pdf_path)
+    cache_file = pages_cache_path(document_hash(pdf_path))
+    try:
+        os.utime(cache_file)
+        inc("page_cache_total", result="hit")
+    except FileNotFoundError:
+        inc("page_cache_total", result="miss")
+        _build_cache(pdf_path, cache_file)
+    return cache_file
+
+def document_info(pdf_path: str) -> dict:
+    with open(_cache_file(pdf_path), "rb") as f:
+        header, _ = _read_header(f)
+    return header
+
+def iter_pages(pdf_path: str, start: int = 0, end: int = None):
+    with open(_cache_file(pdf_path), "rb") as raw:
+        header, data_start = _read_header(raw)
+        end = header["page_count"] if end is None else min(end, header["page_count"])
+        if start >= end:
+            return
+        # seek to the block holding start and only inflate from there
+        block = start // header["block_pages"]
+        raw.seek(data_start + header["offsets"][block])
+        index = block * header["block_pages"]
+        with gzip.GzipFile(fileobj=raw, mode="rb") as f:
+            for line in f:
+                if index >= end:
+                    break
+                if index >= start:
+                    record = json.loads(line)
+                    record["render"] = (pdf_path, index)
+                    yield record
+                index += 1
+
+def extract_document(pdf_path: str, start: int = 0, end: int = None):
+    return list(iter_pages(pdf_path, start, end))
+
+def render_page(handle) -> bytes:
+    import fitz
+    from PIL import Image
+    pdf_path, index = handle
+    with timed("render"), pdf_view(pdf_path) as view:
+        doc = fitz.open(stream=view, filetype="pdf")
+        try:
+            pix = doc[index].get_pixmap(dpi=RENDER_DPI)
+        finally:
+            doc.close()
+        mode = "RGB" if pix.alpha == 0 else "RGBA"
+        img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+        resized = img.resize((img.width // 2, img.height // 2))
+        buffer = io.BytesIO()
+        resized.convert("RGB").save(buffer, format="JPEG", quality=40)
+        return buffer.getvalue()
@@ -0,0 +1,105 @@
+import os
+import re
+import mmap
+import time
+import fcntl
+import hashlib
+from contextlib import contextmanager
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES, PDF_CACHE_MIN_AGE_SECONDS
+
+PAGES_SUFFIX = ".pages.jsonl.gz"
+PAGES_CACHE_VERSION = 3  # bump when the page record layout changes
+
+def cache_path(key: str, etag: str) -> str:
+    name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    tag = re.sub(r"[^A-Za-z0-9-]", "", etag)
+    return os.path.join(PDF_CACHE_DIR, f"{name}-{tag}.pdf")
+
+def pages_cache_path(doc_hash: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{doc_hash}-v{PAGES_CACHE_VERSION}{PAGES_SUFFIX}")
+
+def temp_path(key: str, etag: str) -> str:
+    return f"{cache_path(key, etag)}.{os.getpid()}.part"
+
+def lookup(key: str, etag: str):
+    path = cache_path(key, etag)
+    try:
+        os.utime(path)  # bump LRU position
+    except FileNotFoundError:
+        return None
+    return path
+
+def touch(path: str):
+    # keep a cached PDF out of evict() while a long document is still being read from it
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(PDF_CACHE_DIR):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+@contextmanager
+def key_lock(key: str, etag: str):
+    # flock so that every process on the box shares a single download per object
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    with open(cache_path(key, etag) + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def commit(tmp: str, key: str, etag: str, size: int, md5_hex: str) -> str:
+    actual_size = os.path.getsize(tmp)
+    # md5_hex is None when the ETag is not a content hash (multipart, SSE-KMS, SSE-C): size only
+    if actual_size != size or (md5_hex is not None and md5_hex != etag):
+        os.remove(tmp)
+        raise ValueError(f"Cached download of {key} failed verification (size={actual_size}, md5={md5_hex}, etag={etag})")
+
+    path = cache_path(key, etag)
+    os.replace(tmp, path)
+    return path
+
+def evict():
+    entries = []
+    total = 0
+    for entry in os.scandir(PDF_CACHE_DIR):
+        if not entry.name.endswith((".pdf", PAGES_SUFFIX)):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    if total <= PDF_CACHE_MAX_BYTES:
+        return
+
+    entries.sort()
+    now = time.time()
+    for mtime, size, path in entries:
+        # recently used files may still be open by a running tender, leave them alone
+        if total <= PDF_CACHE_MAX_BYTES or now - mtime < PDF_CACHE_MIN_AGE_SECONDS:
+            break
+        # .lock files stay: another process may hold or be waiting on them, and they are empty
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        print(f"🧹 Evicted cached file {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+
+def open_pdf_mmap(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+@contextmanager
+def pdf_view(path: str):
+    # zero-copy buffer for fitz.open(stream=...); close the fitz document before leaving the block
+    mm = open_pdf_mmap(path)
+    view = memoryview(mm)
+    try:
+        yield view
+    finally:
+        view.release()
+        mm.close()
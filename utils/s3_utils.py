@@ -1,30 +1,203 @@
-import boto3
+import os
+import time
 import asyncio
-from io import BytesIO
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET
-
-_s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
+import hashlib
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils import pdf_cache
+from utils.metrics import timed, inc
+from utils.clients import per_process
+from config import (
+    AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET, S3_ENDPOINT_URL,
+    S3_MAX_POOL_CONNECTIONS, S3_MULTIPART_THRESHOLD, S3_MULTIPART_CHUNKSIZE, S3_LIST_CONCURRENCY,
+    S3_MAX_CONCURRENT_DOWNLOADS, PREFETCH_MAX_DOCS, PREFETCH_MAX_BYTES
 )
 
-async def list_s3_pdfs(prefix: str):
+def _new_s3_client():
+    # boto3 is imported only when the first client is built
+    import boto3
+    from botocore.config import Config
+    return boto3.session.Session().client(
+        "s3",
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION,
+        endpoint_url=S3_ENDPOINT_URL,
+        config=Config(
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+            s3={"addressing_style": "path" if S3_ENDPOINT_URL else "auto"}
+        )
+    )
+
+get_s3_client = per_process(_new_s3_client)
+
+# whole-object downloads and their ranged GETs get separate pools so a download never waits on its own parts
+_download_executor = ThreadPoolExecutor(max_workers=S3_MAX_CONCURRENT_DOWNLOADS, thread_name_prefix="s3-download")
+_range_executor = ThreadPoolExecutor(max_workers=S3_MAX_POOL_CONNECTIONS, thread_name_prefix="s3-range")
+_inflight_downloads = {}
+
+async def list_s3_pdf_objects(prefix: str):
     def _list():
-        paginator = _s3_client.get_paginator("list_objects_v2")
-        pdf_keys = []
+        inc("s3_list_requests_total")
+        paginator = get_s3_client().get_paginator("list_objects_v2")
+        pdf_objects = []
         for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
             for obj in page.get("Contents", []):
                 if obj["Key"].lower().endswith(".pdf"):
-                    pdf_keys.append(obj["Key"])
-        return pdf_keys
+                    pdf_objects.append({"key": obj["Key"], "size": obj["Size"], "etag": obj["ETag"].strip('"')})
+        return pdf_objects
 
     return await asyncio.to_thread(_list)
 
-async def fetch_pdf(key: str) -> BytesIO:
-    def _fetch():
-        obj = _s3_client.get_object(Bucket=S3_BUCKET, Key=key)
-        return BytesIO(obj["Body"].read())
+async def list_s3_pdfs(prefix: str):
+    return [obj["key"] for obj in await list_s3_pdf_objects(prefix)]
+
+async def list_s3_pdf_objects_many(prefixes: list) -> dict:
+    semaphore = asyncio.Semaphore(S3_LIST_CONCURRENCY)
+
+    async def _list_one(prefix):
+        async with semaphore:
+            return prefix, await list_s3_pdf_objects(prefix)
+
+    results = await asyncio.gather(*(_list_one(prefix) for prefix in prefixes))
+    return dict(results)
+
+async def head_pdf_object(key: str) -> dict:
+    def _head():
+        obj = get_s3_client().head_object(Bucket=S3_BUCKET, Key=key)
+        return {"key": key, "size": obj["ContentLength"], "etag": obj["ETag"].strip('"')}
+
+    return await asyncio.to_thread(_head)
+
+def _file_md5(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def _etag_is_md5(etag: str, obj: dict) -> bool:
+    # only single-part objects stored unencrypted or with SSE-S3 carry the content MD5 as ETag;
+    # multipart, SSE-KMS and SSE-C ETags are opaque and only the size can be checked
+    if "-" in etag or obj.get("SSECustomerAlgorithm"):
+        return False
+    return obj.get("ServerSideEncryption") in (None, "AES256")
+
+def _download_single(key: str, etag: str, tmp: str):
+    obj = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key, IfMatch=etag)
+    md5 = hashlib.md5()
+    with open(tmp, "wb") as f:
+        for chunk in obj["Body"].iter_chunks(1024 * 1024):
+            md5.update(chunk)
+            f.write(chunk)
+    return md5.hexdigest() if _etag_is_md5(etag, obj) else None
+
+def _download_ranges(key: str, etag: str, size: int, tmp: str):
+    with open(tmp, "wb") as f:
+        f.truncate(size)
+        fd = f.fileno()
+        etag_is_md5 = []
+
+        def _get_range(start):
+            end = min(start + S3_MULTIPART_CHUNKSIZE, size) - 1
+            obj = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key, IfMatch=etag, Range=f"bytes={start}-{end}")
+            if start == 0:
+                etag_is_md5.append(_etag_is_md5(etag, obj))
+            offset = start
+            for chunk in obj["Body"].iter_chunks(1024 * 1024):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+            if offset != end + 1:
+                raise IOError(f"Short read for {key} range {start}-{end}")
+
+        # every range must finish before the fd is closed, or a running pwrite could land in a reused fd
+        futures = [_range_executor.submit(_get_range, start) for start in range(0, size, S3_MULTIPART_CHUNKSIZE)]
+        wait(futures)
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+    return _file_md5(tmp) if etag_is_md5[0] else None
+
+def _download_pdf(key: str, etag: str, size: int) -> str:
+    with pdf_cache.key_lock(key, etag):
+        path = pdf_cache.lookup(key, etag)
+        if path:
+            inc("cache_hits_total", cache="pdf")
+            return path
+
+        inc("cache_misses_total", cache="pdf")
+        tmp = pdf_cache.temp_path(key, etag)
+        try:
+            with timed("s3_download"):
+                if size >= S3_MULTIPART_THRESHOLD:
+                    md5_hex = _download_ranges(key, etag, size, tmp)
+                else:
+                    md5_hex = _download_single(key, etag, tmp)
+            inc("s3_bytes_total", size)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        path = pdf_cache.commit(tmp, key, etag, size, md5_hex)
+
+    pdf_cache.evict()
+    return path
+
+async def fetch_pdf_file(key: str, etag: str = None, size: int = None) -> str:
+    if etag is None or size is None:
+        head = await head_pdf_object(key)
+        etag, size = head["etag"], head["size"]
+
+    flight = (key, etag)
+    task = _inflight_downloads.get(flight)
+    if task is None:
+        loop = asyncio.get_running_loop()
+        # run_in_executor drops contextvars: carry the requesting tender's context so s3_download
+        # lands in its report timings (a download shared by several tenders is timed for the first)
+        ctx = contextvars.copy_context()
+        task = asyncio.ensure_future(loop.run_in_executor(_download_executor, ctx.run, _download_pdf, key, etag, size))
+        _inflight_downloads[flight] = task
+        task.add_done_callback(lambda _: _inflight_downloads.pop(flight, None))
+
+    return await asyncio.shield(task)
+
+async def prefetch_pdfs(pdf_objects: list, max_docs: int = PREFETCH_MAX_DOCS, max_bytes: int = PREFETCH_MAX_BYTES):
+    # yields (pdf_object, pdf_path or exception, s3_wait_seconds) in order, downloading up to
+    # max_docs ahead; the next document is always admitted even if it alone exceeds max_bytes
+    pending = deque()
+    held_bytes = 0
+    next_index = 0
+
+    def _fill():
+        nonlocal held_bytes, next_index
+        while next_index < len(pdf_objects) and len(pending) <= max_docs:
+            obj = pdf_objects[next_index]
+            if pending and held_bytes + obj["size"] > max_bytes:
+                break
+            pending.append((obj, asyncio.ensure_future(fetch_pdf_file(obj["key"], obj["etag"], obj["size"]))))
+            held_bytes += obj["size"]
+            next_index += 1
+
+    try:
+        _fill()
+        while pending:
+            obj, task = pending[0]
+            start = time.perf_counter()
+            try:
+                result = await task
+            except Exception as e:
+                result = e
+            s3_wait = time.perf_counter() - start
+
+            yield obj, result, s3_wait
 
-    return await asyncio.to_thread(_fetch)
+            pending.popleft()
+            held_bytes -= obj["size"]
+            _fill()
+    finally:
+        for _, task in pending:
+            task.cancel()